@@ -9,6 +9,12 @@ import sys
 import platform
 import subprocess
 import os
+import functools
+
+@functools.lru_cache(maxsize=1)
+def _machine():
+    """Machine architecture of this interpreter (cached)"""
+    return platform.machine()
 
 def check_architecture():
     """Check system and Python architecture"""
@@ -16,22 +22,16 @@ def check_architecture():
     print("=" * 40)
     
     # System architecture
-    system_arch = platform.machine()
+    system_arch = _machine()
     print(f"System Architecture: {system_arch}")
     
-    # Python architecture
-    python_arch = platform.machine()
-    print(f"Python Architecture: {python_arch}")
+    # Python build (platform.machine() is the same for this interpreter, its word size is what differs)
+    python_bits = "64-bit" if sys.maxsize > 2**32 else "32-bit"
+    print(f"Python Build: {python_bits}")
     
     # Check if on Apple Silicon
     if system_arch == "arm64":
         print("✅ Running on Apple Silicon (ARM64)")
-        if python_arch == "x86_64":
-            print("⚠️  WARNING: Using x86_64 Python on ARM64 system")
-            print("   This can cause architecture mismatch issues")
-            return False
-        else:
-            print("✅ Python architecture matches system")
     else:
         print(f"ℹ️  Running on {system_arch} system")
     
@@ -56,13 +56,14 @@ def find_python_installations():
     for location in locations:
         if os.path.exists(location):
             try:
-                result = subprocess.run([location, "--version"], capture_output=True, text=True)
+                # One interpreter launch reports both version and architecture
+                result = subprocess.run(
+                    [location, "-c", "import platform, sys; print(sys.version.split()[0]); print(platform.machine())"],
+                    capture_output=True, text=True)
                 if result.returncode == 0:
-                    version = result.stdout.strip()
-                    # Check architecture
-                    arch_result = subprocess.run([location, "-c", "import platform; print(platform.machine())"], 
-                                                capture_output=True, text=True)
-                    arch = arch_result.stdout.strip() if arch_result.returncode == 0 else "unknown"
+                    lines = result.stdout.splitlines()
+                    version = f"Python {lines[0]}" if lines else "unknown"
+                    arch = lines[1] if len(lines) > 1 else "unknown"
                     
                     pythons.append({
                         "path": location,
@@ -82,7 +83,7 @@ def recommend_solution():
     print("\nRecommended Solution")
     print("=" * 40)
     
-    system_arch = platform.machine()
+    system_arch = _machine()
     
     if system_arch == "arm64":
         print("For Apple Silicon (M1/M2) Macs:")
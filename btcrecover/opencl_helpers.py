@@ -24,36 +24,180 @@ try:
 except:
     pass
 
+import os
+import time
+
 import btcrecover.btcrpass
 
+def _wavefront_size(device, vendor):
+    # Work groups should be a whole number of wavefronts (AMD) or warps (NVIDIA)
+    if device.type & pyopencl.device_type.CPU:
+        return 1
+    if "nvidia" in vendor:
+        return 32
+    if "amd" in vendor or "advanced micro devices" in vendor:
+        return 64
+    return 1
+
 def auto_select_opencl_platform(loaded_wallet):
     best_device_worksize = 0
     best_score_sofar = -1
+    # BTCR_OCL_DEVICE=<idx> picks a device manually, counting devices across all platforms in order
+    forced_device = os.environ.get("BTCR_OCL_DEVICE")
+    if forced_device is not None:
+        try:
+            forced_device = int(forced_device)
+        except ValueError:
+            print("Error: Invalid OpenCL device selected in BTCR_OCL_DEVICE")
+            exit()
+    device_index = 0
     for i, platformNum in enumerate(pyopencl.get_platforms()):
-        for device in platformNum.get_devices():
-            cur_score = 0
-            if device.type & pyopencl.device_type.ACCELERATOR: # always best
+        for j, device in enumerate(platformNum.get_devices()):
+            dtype = device.type
+            vendor = device.vendor.lower()
+            # Rank by raw throughput (compute units x clock), weighted by device type
+            if dtype & pyopencl.device_type.ACCELERATOR: # always best
                 if "oclgrind" not in device.name.lower(): # Some simulators present as an accelerator...
-                    cur_score += 8
-            elif device.type & pyopencl.device_type.GPU: # better than CPU
-                cur_score += 4
-            if "nvidia" in device.vendor.lower(): # is never an IGP: very good
+                    type_weight = 8
+                else:
+                    type_weight = 0
+            elif dtype & pyopencl.device_type.GPU:
+                # Integrated GPUs/APUs share host memory, discrete GPUs don't (and are better)
+                type_weight = 2 if device.host_unified_memory else 4
+            else:
+                type_weight = 1
+            # (scaled by 4 so that the vendor bonus below can only ever break a tie)
+            cur_score = device.max_compute_units * device.max_clock_frequency * type_weight * 4
+            if "nvidia" in vendor:
                 cur_score += 2
-            elif "amd" in device.vendor.lower(): # sometimes an IGP: good
+            elif "amd" in vendor:
                 cur_score += 1
-            if cur_score >= best_score_sofar:  # (intel is always an IGP)
-                if cur_score > best_score_sofar:
-                    best_score_sofar = cur_score
-                    best_device = device.name
-                    best_platform = i
-                    if device.max_work_group_size > best_device_worksize:
-                        best_device_worksize = device.max_work_group_size
+            if forced_device is not None:
+                cur_score = 1 if device_index == forced_device else 0
+            device_index += 1
+            if cur_score > best_score_sofar:
+                best_score_sofar = cur_score
+                best_device = device.name
+                best_device_number = j
+                best_platform = i
+                best_device_worksize = device.max_work_group_size
+                best_device_wavefront = _wavefront_size(device, vendor)
+
+    if forced_device is not None:
+        if not 0 <= forced_device < device_index:
+            print("Error: Invalid OpenCL device selected in BTCR_OCL_DEVICE")
+            exit()
+        loaded_wallet.opencl_devices = [best_device_number]
+
+    # Round down to a whole number of wavefronts (local sizes beyond 256 give no further benefit)
+    best_device_worksize = (best_device_worksize // best_device_wavefront) * best_device_wavefront or best_device_worksize
 
     loaded_wallet.opencl_platform = best_platform
     loaded_wallet.opencl_device_worksize = best_device_worksize
+    loaded_wallet.opencl_local_worksize = min(best_device_worksize, 256)
     print("OpenCL: Auto Selecting Best Platform")
 
 def init_opencl_contexts(loaded_wallet, openclDevice = 0):
+    local_worksize = _requested_local_worksize(loaded_wallet)
+    # Calibration (opt-in with BTCR_OCL_CALIBRATE=1) tries several local sizes, so none can be compiled in
+    calibrate = os.environ.get("BTCR_OCL_CALIBRATE") == "1"
+    build_worksize = None if calibrate else local_worksize
+    try:
+        _create_opencl_contexts(loaded_wallet, openclDevice, build_worksize = build_worksize)
+        applied_worksize = _apply_kernel_work_group_limits(loaded_wallet, local_worksize)
+        rebuild = bool(build_worksize) and applied_worksize != build_worksize
+    except pyopencl.Error:
+        if not build_worksize:
+            raise
+        rebuild = True
+
+    # The kernels can't run with the local work size they were compiled for, so rebuild them without it
+    if rebuild:
+        _create_opencl_contexts(loaded_wallet, openclDevice)
+        _apply_kernel_work_group_limits(loaded_wallet, local_worksize)
+
+    if calibrate:
+        _calibrate_opencl_worksizes(loaded_wallet, openclDevice)
+
+def _calibrate_opencl_worksizes(loaded_wallet, openclDevice):
+    # Time a 1-iteration PBKDF2 batch for each candidate local/global size and keep the fastest
+    calibration_algo = opencl.opencl_algos(loaded_wallet.opencl_platform, 0, False, inv_memory_density=1,
+                                           openclDevice=openclDevice)
+    calibration_context = calibration_algo.cl_pbkdf2_init("sha512", 16, 64)
+    interface = calibration_algo.opencl_ctx
+    max_local_worksize = min(loaded_wallet.opencl_kernel_worksize, calibration_context[0].pbkdf2.get_work_group_info(
+        pyopencl.kernel_work_group_info.WORK_GROUP_SIZE, interface.queue.device))
+    base_global_worksize = interface.workgroupsize
+    salt = b"\x00" * 16
+
+    best_time = None
+    for local_worksize in (32, 64, 128, 256):
+        if local_worksize > max_local_worksize:
+            continue
+        for global_worksize in (base_global_worksize, base_global_worksize * 2, base_global_worksize * 4):
+            interface.local_worksize = local_worksize
+            interface.workgroupsize = global_worksize
+            passwords = [b"password"] * global_worksize
+            try:
+                calibration_algo.cl_pbkdf2(calibration_context, passwords, salt, 1, 64) # warm up
+                start = time.perf_counter_ns()
+                calibration_algo.cl_pbkdf2(calibration_context, passwords, salt, 1, 64)
+                elapsed = (time.perf_counter_ns() - start) / global_worksize
+            except pyopencl.Error:
+                continue
+            if best_time is None or elapsed < best_time:
+                best_time = elapsed
+                loaded_wallet.opencl_lws = local_worksize
+                loaded_wallet.opencl_gws = global_worksize
+
+    if best_time is None:
+        print("OpenCL: Calibration failed, using default work sizes")
+        return
+
+    for algo in (loaded_wallet.opencl_algo, loaded_wallet.opencl_algo_2, loaded_wallet.opencl_algo_3):
+        algo.opencl_ctx.local_worksize = loaded_wallet.opencl_lws
+        algo.opencl_ctx.workgroupsize = loaded_wallet.opencl_gws
+    print("OpenCL: Calibrated Local Work Size:", loaded_wallet.opencl_lws, "Global Work Size:", loaded_wallet.opencl_gws)
+
+def _requested_local_worksize(loaded_wallet):
+    # BTCR_OCL_LWS overrides the local work size for advanced users, 0 lets the driver choose
+    if os.environ.get("BTCR_OCL_LWS"):
+        return int(os.environ["BTCR_OCL_LWS"])
+    return getattr(loaded_wallet, "opencl_local_worksize", None)
+
+def _opencl_programs(loaded_wallet):
+    # Contexts are [prg, bufStructs] pairs, or lists of them (one per derivation salt)
+    for name, context in list(vars(loaded_wallet).items()):
+        if not name.startswith("opencl_context_") or not isinstance(context, list) or not context:
+            continue
+        for ctx in (context if isinstance(context[0], list) else [context]):
+            yield ctx[0]
+
+def _apply_kernel_work_group_limits(loaded_wallet, local_worksize):
+    # The device-wide max_work_group_size is only an upper bound, each compiled kernel can be far more limited
+    device = loaded_wallet.opencl_algo.opencl_ctx.queue.device
+    kernel_worksize = device.max_work_group_size
+    kernel_worksize_multiple = 1
+    for prg in _opencl_programs(loaded_wallet):
+        for kernel in prg.all_kernels():
+            kernel_worksize = min(kernel_worksize, kernel.get_work_group_info(
+                pyopencl.kernel_work_group_info.WORK_GROUP_SIZE, device))
+            kernel_worksize_multiple = max(kernel_worksize_multiple, kernel.get_work_group_info(
+                pyopencl.kernel_work_group_info.PREFERRED_WORK_GROUP_SIZE_MULTIPLE, device))
+
+    loaded_wallet.opencl_kernel_worksize = kernel_worksize
+    loaded_wallet.opencl_kernel_worksize_multiple = kernel_worksize_multiple
+
+    # Round any requested local work size down to the kernel max, and to a multiple of the preferred multiple
+    if local_worksize:
+        local_worksize = min(local_worksize, kernel_worksize)
+        if local_worksize >= kernel_worksize_multiple:
+            local_worksize -= local_worksize % kernel_worksize_multiple
+        for algo in (loaded_wallet.opencl_algo, loaded_wallet.opencl_algo_2, loaded_wallet.opencl_algo_3):
+            algo.opencl_ctx.local_worksize = local_worksize
+    return local_worksize
+
+def _create_opencl_contexts(loaded_wallet, openclDevice = 0, build_worksize = None):
     dklen = 64
     platform = loaded_wallet.opencl_platform
     debug = 0
@@ -68,6 +212,10 @@ def init_opencl_contexts(loaded_wallet, openclDevice = 0):
     loaded_wallet.opencl_algo_3 = opencl.opencl_algos(platform, debug, write_combined_file, inv_memory_density=1,
                                                     openclDevice=openclDevice)
 
+    # Compile the chosen local work size into the PBKDF2 kernels (as reqd_work_group_size)
+    for algo in (loaded_wallet.opencl_algo, loaded_wallet.opencl_algo_2, loaded_wallet.opencl_algo_3):
+        algo.opencl_ctx.build_worksize = build_worksize
+
     # Password recovery for blockchain.com wallet
     if type(loaded_wallet) is btcrecover.btcrpass.WalletBlockchain:
         loaded_wallet.opencl_context_pbkdf2_sha1 = loaded_wallet.opencl_algo.cl_pbkdf2_init("sha1", len(
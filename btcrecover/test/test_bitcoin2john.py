@@ -0,0 +1,247 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# test_bitcoin2john.py -- unit tests for btcrecover_cli/bitcoin2john.py
+#
+# This file is part of btcrecover.
+#
+# btcrecover is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version
+# 2 of the License, or (at your option) any later version.
+#
+# btcrecover is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see http://www.gnu.org/licenses/
+
+
+import unittest, os, sys, tempfile, shutil, random
+
+if __name__ == '__main__':
+    sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from btcrecover_cli import bitcoin2john
+
+
+WALLET_DIR = os.path.join(os.path.dirname(__file__), "test-wallets")
+
+# John hashes of the bundled Berkeley DB wallets (the mkey fields agree with btcrpass.WalletBitcoinCore)
+BDB_WALLET_HASHES = {
+    "bitcoincore-wallet.dat":
+        "$bitcoin$48$2e2c3b9b58e9b33c9799b4472e83c136e6246120c45e390daa6a57476e7fbe4f57d83f79d75f9b4c1db680fe5a846cb8"
+        "$8$4593aff5639179c7$67908$48$9433f125815aba9def3d0c1dc5f65a0bb20f6bbbb3573f72bc14debb8cdde2c7dd86143a78e5455e7f54fc5e10294cc7$0",
+    "bitcoincore-0.20.1-wallet.dat":
+        "$bitcoin$48$a4307d977955ea5b540fd3625495b7cae035a2eb00185384045ad3258c396c354ef0f0ac491c38f62b0e556727110b3d"
+        "$8$f141e46f5ee8625a$208333$48$30cc0be85244b170b747565aa307a22bf177122735c6df85815360e097f55716b21a4d10d1bc9a3b867c333f2e266e48$0",
+    "dogecoincore-1.14.2-wallet.dat":
+        "$bitcoin$48$c9b25904c88ab69f36f13e0a30a0eac5c88b37669e23f2beb36febdf0309ae607955b9be4abc3419ce3f8456ab90a5b1"
+        "$8$2ae5c3f5d1398448$173399$48$480725c562a73200dcf3f7db03d3db83cedc844380ce9592a17372f6371ad23be4e572fd5570db597b398ce7d45cb951$0",
+    "litecoincore-0.18.1-wallet.dat":
+        "$bitcoin$48$4937d3115004f88f104ae68d97535376a2fdda2ab2cccb65952dce469b15bc6413b405d33dd9da4622501321d7a5170d"
+        "$8$a2e09085fd269c79$213316$48$24b779bca4079ba1fbc22ffa527e23c0c8ce02f7bf956464498114af22d32049b1a511c494324665472e42c441f2aa0f$0",
+    "tenup-1.1.0.4-wallet.dat":
+        "$bitcoin$48$ba90477194def4103e5a3c604f733607edb1f312adacee0712c717b693b9cf6d3f643c4c52ddec75e62f09373c88b787"
+        "$8$17807f09637a068f$202436$48$d48bf43b24053340f70db8ad19a393366848c3202e2bfe203217cd771f1e4cc69d0b7b0f0cf4cb488e83ad97e50e32dc$0",
+}
+
+
+class TestBase58(unittest.TestCase):
+
+    # Exercises the pure Python implementation, even when based58 is installed
+    def setUp(self):
+        self.has_based58 = bitcoin2john.HAS_BASED58
+        bitcoin2john.HAS_BASED58 = False
+
+    def tearDown(self):
+        bitcoin2john.HAS_BASED58 = self.has_based58
+
+    def test_known_vectors(self):
+        # hash160 of the genesis block coinbase public key
+        h160 = bytes.fromhex("62e907b15cbf27d5425399ebf6f0fb50ebb88f18")
+        self.assertEqual(bitcoin2john.hash_160_to_bc_address(h160), "1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNa")
+        self.assertEqual(bitcoin2john.bc_address_to_hash_160("1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNa"), h160)
+        self.assertEqual(bitcoin2john.b58encode(b"hello world"), "StV1DL6CwTryKyV")
+        self.assertEqual(bitcoin2john.b58decode("StV1DL6CwTryKyV", None), b"hello world")
+        self.assertEqual(bitcoin2john.b58encode("hello world"), "StV1DL6CwTryKyV")
+        payload = bitcoin2john.b58decode("3Au8ZodNHPei7MQiSVAWb7NB2yqsb48GW4", 25)
+        self.assertEqual(payload[0], 5)
+        self.assertEqual(bitcoin2john.Hash(payload[:21])[:4], payload[21:])
+
+    def test_leading_zeros(self):
+        self.assertEqual(bitcoin2john.b58encode(b"\x00\x00\x01"), "112")
+        self.assertEqual(bitcoin2john.b58decode("112", 3), b"\x00\x00\x01")
+        self.assertEqual(bitcoin2john.b58encode(b"\x00\x00\xff\xff"), "11LUv")
+        self.assertEqual(bitcoin2john.b58decode("11LUv", None), b"\x00\x00\xff\xff")
+
+    def test_all_zeros(self):
+        # (as in the original pywallet code, the zero value itself also encodes to a '1')
+        self.assertEqual(bitcoin2john.b58encode(b""), "1")
+        self.assertEqual(bitcoin2john.b58encode(b"\x00"), "11")
+        self.assertEqual(bitcoin2john.b58encode(b"\x00" * 3), "1111")
+        self.assertEqual(bitcoin2john.b58decode("1", None), b"\x00\x00")
+        self.assertEqual(bitcoin2john.b58decode("1" * 8, None), b"\x00" * 9)
+
+    def test_invalid(self):
+        for invalid in ("0", "O", "I", "l", "3Au8Z0", "abc ", "é"):
+            with self.subTest(invalid):
+                self.assertIsNone(bitcoin2john.b58decode(invalid, None))
+        self.assertIsNone(bitcoin2john.b58decode("112", 2))
+        self.assertIsNone(bitcoin2john.b58decode("1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNa", 24))
+
+    def test_round_trip(self):
+        rng = random.Random(0)
+        # Lengths on both sides of the 8-digit decode folds and 10-digit encode chunks
+        for length in range(1, 80):
+            for zeros in (0, 1, 5):
+                data = b"\x00" * zeros + bytes([rng.randrange(1, 256)]) + bytes(rng.randrange(256) for _ in range(length - 1))
+                with self.subTest(length=length, zeros=zeros):
+                    encoded = bitcoin2john.b58encode(data)
+                    self.assertEqual(len(encoded) - len(encoded.lstrip("1")), zeros)
+                    self.assertEqual(bitcoin2john.b58decode(encoded, len(data)), data)
+                    self.assertEqual(bitcoin2john.b58decode(encoded.encode("ascii"), len(data)), data)
+                    self.assertEqual(encoded, "1" * zeros + self.naive_b58encode(data))
+
+    @staticmethod
+    def naive_b58encode(data):
+        alphabet = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+        value, digits = int.from_bytes(data, "big"), ""
+        while value:
+            value, mod = divmod(value, 58)
+            digits = alphabet[mod] + digits
+        return digits
+
+
+class TestRawDeviceScan(unittest.TestCase):
+
+    CHUNK = 4096
+
+    @classmethod
+    def setUpClass(cls):
+        prekey, prekey2 = bitcoin2john.prekeys
+        data = bytearray(4 * cls.CHUNK)
+        # Ends exactly on the chunk 1/2 boundary
+        data[2 * cls.CHUNK - len(prekey):2 * cls.CHUNK] = prekey
+        # Straddles the chunk 2/3 boundary, so only the widened find_offsets window sees it
+        data[3 * cls.CHUNK - 4:3 * cls.CHUNK + len(prekey2) - 4] = prekey2
+        # Ends on the last byte of the device
+        data[-len(prekey2):] = prekey2
+        fd, cls.device = tempfile.mkstemp("-test-btcr")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+
+    @classmethod
+    def tearDownClass(cls):
+        os.remove(cls.device)
+
+    def test_first_read(self):
+        # The range holding the last chunk is closed at the end of the device
+        self.assertEqual(bitcoin2john.first_read(self.device, 4 * self.CHUNK, bitcoin2john.prekeys, inc=self.CHUNK),
+                         [self.CHUNK, 2 * self.CHUNK, 3 * self.CHUNK, 4 * self.CHUNK])
+
+    def test_find_offsets(self):
+        ranges = [self.CHUNK, 2 * self.CHUNK, 3 * self.CHUNK, 4 * self.CHUNK]
+        to_read, offsets = bitcoin2john.find_offsets(self.device, ranges, bitcoin2john.prekeys)
+        margin = len(bitcoin2john.prekeys[0]) + 1
+        self.assertEqual(to_read, 2 * (self.CHUNK + 2 * margin + 1))
+        # (offsets are those of the last byte of each prekey)
+        self.assertEqual(offsets, [2 * self.CHUNK - 1, 3 * self.CHUNK + len(bitcoin2john.prekeys[1]) - 5,
+                                   4 * self.CHUNK - 1])
+
+    def test_find_offsets_past_end(self):
+        # Windows running past the end of the device are clamped, and ones starting beyond it skipped
+        to_read, offsets = bitcoin2john.find_offsets(self.device, [4 * self.CHUNK - 20, 5 * self.CHUNK,
+                                                                    6 * self.CHUNK, 7 * self.CHUNK],
+                                                     bitcoin2john.prekeys)
+        self.assertEqual(offsets, [4 * self.CHUNK - 1])
+
+
+class TestMmapWalletReader(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_dir = tempfile.mkdtemp("-test-btcr")
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.temp_dir, ignore_errors=True)
+
+    def make_file(self, name, data):
+        path = os.path.join(self.temp_dir, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def read_wallet_data(self, wallet_filename):
+        return bitcoin2john.read_wallet({}, wallet_filename, False, False, "", False, -1, False)
+
+    def test_john_hashes(self):
+        for filename, john_hash in BDB_WALLET_HASHES.items():
+            with self.subTest(filename):
+                wallet_filename = os.path.join(WALLET_DIR, filename)
+                wallet_data = self.read_wallet_data(wallet_filename)
+                self.assertTrue(wallet_data['_encrypted'])
+                self.assertEqual(bitcoin2john.generate_john_hash(wallet_filename, wallet_data, filename),
+                                 filename + ":" + john_hash)
+
+    def test_parse_uses_mmap_reader(self):
+        wallet_filename = os.path.join(WALLET_DIR, "bitcoincore-wallet.dat")
+        record_types = []
+        self.assertTrue(bitcoin2john._mmap_parse_wallet(wallet_filename, lambda t, d: record_types.append(t)))
+        self.assertEqual(len(record_types), len(bitcoin2john._mmap_wallet_records(wallet_filename)))
+        self.assertEqual(record_types.count("mkey"), 1)
+        self.assertEqual(record_types.count("ckey"), 201)
+
+    @unittest.skipUnless(bitcoin2john.HAS_BSDDB, "requires bsddb3")
+    def test_records_match_bsddb(self):
+        for filename in BDB_WALLET_HASHES:
+            with self.subTest(filename):
+                wallet_filename = os.path.join(WALLET_DIR, filename)
+                db = bitcoin2john.open_wallet(wallet_filename)
+                try:
+                    bsddb_records = [(bytes(k), bytes(v)) for k, v in db.items()]
+                finally:
+                    db.close()
+                self.assertEqual(bitcoin2john._mmap_wallet_records(wallet_filename), bsddb_records)
+
+    def test_truncated_file(self):
+        with open(os.path.join(WALLET_DIR, "bitcoincore-wallet.dat"), "rb") as f:
+            data = f.read()
+        page_size = int.from_bytes(data[20:24], "little")
+        # Cut mid-page, and on a page boundary so that the tree points past the end of the file
+        for length in (len(data) - 100, 3 * page_size, 256):
+            with self.subTest(length):
+                wallet_filename = self.make_file("truncated-wallet.dat", data[:length])
+                with self.assertRaises(ValueError):
+                    bitcoin2john._mmap_wallet_records(wallet_filename)
+                self.assertFalse(bitcoin2john._mmap_parse_wallet(wallet_filename, self.fail))
+
+    def test_not_a_btree(self):
+        for wallet_filename in (os.path.join(WALLET_DIR, "bitcoincore-0.21.1-wallet.dat"),  # SQLite
+                                self.make_file("zeros-wallet.dat", bytes(8192))):
+            with self.subTest(wallet_filename):
+                with self.assertRaises(ValueError):
+                    bitcoin2john._mmap_wallet_records(wallet_filename)
+                self.assertFalse(bitcoin2john._mmap_parse_wallet(wallet_filename, self.fail))
+
+    def test_falls_back_to_bsddb(self):
+        wallet_filename = self.make_file("zeros-wallet.dat", bytes(8192))
+        opened = []
+        def open_wallet(path):
+            opened.append(path)
+            raise RuntimeError("bsddb fallback")
+        real_open_wallet = bitcoin2john.open_wallet
+        bitcoin2john.open_wallet = open_wallet
+        try:
+            with self.assertRaisesRegex(RuntimeError, "bsddb fallback"):
+                self.read_wallet_data(wallet_filename)
+        finally:
+            bitcoin2john.open_wallet = real_open_wallet
+        self.assertEqual(opened, [wallet_filename])
+
+
+if __name__ == '__main__':
+    unittest.main()
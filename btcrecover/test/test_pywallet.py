@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# test_pywallet.py -- unit tests for btcrecover_cli/pywallet.py
+#
+# This file is part of btcrecover.
+#
+# btcrecover is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version
+# 2 of the License, or (at your option) any later version.
+#
+# btcrecover is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see http://www.gnu.org/licenses/
+
+
+import unittest, os, sys
+
+if __name__ == '__main__':
+    sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from btcrecover_cli import pywallet
+
+
+WALLET_DIR = os.path.join(os.path.dirname(__file__), "test-wallets")
+
+
+@unittest.skipUnless(pywallet.HAS_PYCRYPTO, "requires pycryptodome")
+class TestWalletDumperDecryption(unittest.TestCase):
+
+    wallet_filename = os.path.join(WALLET_DIR, "bitcoincore-wallet.dat")
+
+    def dump(self, passphrase):
+        return pywallet.WalletDumper().dump_wallet(self.wallet_filename, passphrase)
+
+    def test_correct_password(self):
+        wallet_data = self.dump("btcr-test-password")
+        keys = wallet_data['keys']
+        self.assertEqual(len(keys), 201)
+        for key in keys:
+            self.assertEqual(key['decryption_status'], 'success')
+            self.assertEqual(len(bytes.fromhex(key['private_key'])), 32)
+
+    def test_wrong_password(self):
+        keys = self.dump("btcr-wrong-password")['keys']
+        self.assertEqual(len(keys), 201)
+        for key in keys:
+            self.assertEqual(key['decryption_status'], 'failed')
+            self.assertEqual(key['private_key'], 'ENCRYPTED')
+
+    def test_batch_matches_per_key(self):
+        dumper = pywallet.WalletDumper()
+        keys = dumper.dump_wallet(self.wallet_filename)['keys']
+        master_key = dumper._unlock_master_key("btcr-test-password")
+        self.assertIsNotNone(master_key)
+
+        ckeys = [(bytes.fromhex(k['encrypted_private_key']), bytes.fromhex(k['public_key'])) for k in keys]
+        batch = pywallet._decrypt_ckeys(master_key, ckeys)
+        per_key = [pywallet._decrypt_ckey(master_key, ct, pk) for ct, pk in ckeys]
+        self.assertEqual(batch, per_key)
+        self.assertTrue(all(batch))
+
+
+if __name__ == '__main__':
+    unittest.main()
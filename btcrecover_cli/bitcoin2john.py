@@ -24,20 +24,22 @@ import traceback
 import hashlib
 import random
 import math
-import binascii
+import mmap
 import socket
 import time
 from datetime import datetime
 from pathlib import Path
 
+# bsddb is only needed for wallets the built-in BTree reader can't handle (see open_wallet)
 try:
     from bsddb3.db import *
+    HAS_BSDDB = True
 except ImportError:
     try:
         from bsddb.db import *
+        HAS_BSDDB = True
     except ImportError:
-        print("Error: bsddb3 or bsddb package is required", file=sys.stderr)
-        sys.exit(1)
+        HAS_BSDDB = False
 
 try:
     import json
@@ -58,6 +60,20 @@ except ImportError:
     HAS_ECDSA = False
     print("Warning: ecdsa module not available - some legacy features disabled", file=sys.stderr)
 
+# Optional libsecp256k1 bindings for the legacy KEY class (ecdsa is still needed for DER handling)
+try:
+    import coincurve
+    HAS_COINCURVE = True
+except ImportError:
+    HAS_COINCURVE = False
+
+# Optional C-backed base58 (falls back to the pure Python implementation below)
+try:
+    import based58
+    HAS_BASED58 = True
+except ImportError:
+    HAS_BASED58 = False
+
 # Constants from original implementation
 max_version = 81000
 addrtype = 0
@@ -81,8 +97,8 @@ To = 1e12
 Tio = 1024 ** 4
 
 # Key detection patterns for raw device reading
-prekeys = [binascii.unhexlify("308201130201010420"), binascii.unhexlify("308201120201010420")]
-postkeys = [binascii.unhexlify("a081a530"), binascii.unhexlify("81a530")]
+prekeys = [bytes.fromhex("308201130201010420"), bytes.fromhex("308201120201010420")]
+postkeys = [bytes.fromhex("a081a530"), bytes.fromhex("81a530")]
 
 
 class SerializationError(Exception):
@@ -90,13 +106,48 @@ class SerializationError(Exception):
     pass
 
 
+# Copying a prebuilt ripemd160 object skips hashlib.new()'s by-name algorithm lookup
+try:
+    _RIPEMD160 = hashlib.new('ripemd160')
+except ValueError:
+    # (OpenSSL 3 without the legacy provider: hash_160 raises when it is used instead)
+    _RIPEMD160 = None
+
+
+def _new_ripemd160():
+    return _RIPEMD160.copy() if _RIPEMD160 is not None else hashlib.new('ripemd160')
+
+
 def hash_160(public_key):
     """Generate RIPEMD160(SHA256(public_key)) hash"""
-    md = hashlib.new('ripemd160')
+    md = _new_ripemd160()
     md.update(hashlib.sha256(public_key).digest())
     return md.digest()
 
 
+def hash_160_batch(public_keys):
+    """Generate RIPEMD160(SHA256(public_key)) for many keys, reusing one ripemd160 template"""
+    sha256 = hashlib.sha256
+    template = _new_ripemd160()
+    hashes = []
+    for public_key in public_keys:
+        md = template.copy()
+        md.update(sha256(public_key).digest())
+        hashes.append(md.digest())
+    return hashes
+
+
+def _derive_addresses(public_keys):
+    """Convert a list of public keys to Bitcoin addresses"""
+    return [hash_160_to_bc_address(h160) for h160 in hash_160_batch(public_keys)]
+
+
+def derive_address_map(public_keys):
+    """Map each distinct public key to its address, in one batch (a single reused ripemd160 template)"""
+    unique_pubkeys = list(dict.fromkeys(public_keys))
+    return dict(zip(unique_pubkeys, _derive_addresses(unique_pubkeys)))
+
+
 def public_key_to_bc_address(public_key):
     """Convert public key to Bitcoin address"""
     h160 = hash_160(public_key)
@@ -121,57 +172,78 @@ def bc_address_to_hash_160(addr):
 __b58chars = '123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz'
 __b58base = len(__b58chars)
 
+# Base58 digit value for every byte, 0xff for bytes outside the alphabet
+_B58_CHAR_TO_VAL = bytearray(b'\xff' * 256)
+for _i, _c in enumerate(__b58chars):
+    _B58_CHAR_TO_VAL[ord(_c)] = _i
+_B58_CHAR_TO_VAL = bytes(_B58_CHAR_TO_VAL)
+del _i, _c
+_B58_BASE_8 = __b58base ** 8
+_B58_BASE_10 = __b58base ** 10
+_B58_VAL_TO_CHAR = __b58chars.encode('ascii').ljust(256, b'\x00')
+
 
 def b58encode(v):
     """Encode bytes to base58"""
     if isinstance(v, str):
         v = v.encode('latin1')
     
-    long_value = 0
-    for (i, c) in enumerate(v[::-1]):
-        if isinstance(c, str):
-            c = ord(c)
-        long_value += (256 ** i) * c
-
-    result = ''
+    if HAS_BASED58:
+        return based58.b58encode(v).decode('ascii')
+    
+    long_value = int.from_bytes(v, 'big')
+
+    # Peel off 10 digits per bignum divmod, then split them with small-int arithmetic
+    digits = []
+    while long_value >= _B58_BASE_10:
+        long_value, chunk = divmod(long_value, _B58_BASE_10)
+        for _ in range(10):
+            chunk, mod = divmod(chunk, __b58base)
+            digits.append(mod)
     while long_value >= __b58base:
-        div, mod = divmod(long_value, __b58base)
-        result = __b58chars[mod] + result
-        long_value = div
-    result = __b58chars[long_value] + result
+        long_value, mod = divmod(long_value, __b58base)
+        digits.append(mod)
+    digits.append(long_value)
+    result = bytes(digits[::-1]).translate(_B58_VAL_TO_CHAR).decode('ascii')
 
     # Bitcoin leading-zero-compression
-    nPad = 0
-    for c in v:
-        if isinstance(c, str):
-            c = ord(c)
-        if c == 0:
-            nPad += 1
-        else:
-            break
+    nPad = len(v) - len(v.lstrip(b'\x00'))
 
     return (__b58chars[0] * nPad) + result
 
 
 def b58decode(v, length):
     """Decode base58 to bytes"""
+    if HAS_BASED58:
+        try:
+            result = based58.b58decode(v.encode('ascii') if isinstance(v, str) else v)
+        except ValueError:
+            return None
+        if length is not None and len(result) != length:
+            return None
+        return result
+    
+    try:
+        digits = (v.encode('ascii') if isinstance(v, str) else bytes(v)).translate(_B58_CHAR_TO_VAL)
+    except UnicodeEncodeError:
+        return None
+    if b'\xff' in digits:
+        return None
+    
+    # Fold 8 digits at a time in small ints, so there is only one bignum multiply per 8 chars
     long_value = 0
-    for (i, c) in enumerate(v[::-1]):
-        long_value += __b58chars.find(c) * (__b58base ** i)
-
-    result = b''
-    while long_value >= 256:
-        div, mod = divmod(long_value, 256)
-        result = bytes([mod]) + result
-        long_value = div
-    result = bytes([long_value]) + result
-
-    nPad = 0
-    for c in v:
-        if c == __b58chars[0]:
-            nPad += 1
-        else:
-            break
+    n8 = len(digits) - len(digits) % 8
+    for i in range(0, n8, 8):
+        d0, d1, d2, d3, d4, d5, d6, d7 = digits[i:i + 8]
+        long_value = long_value * _B58_BASE_8 + (((((((d0 * 58 + d1) * 58 + d2) * 58 + d3) * 58 + d4) * 58 + d5) * 58 + d6) * 58 + d7)
+    for c in digits[n8:]:
+        long_value = long_value * 58 + c
+
+    # (at least one byte, so a zero value still decodes to b'\x00')
+    result = long_value.to_bytes(max((long_value.bit_length() + 7) // 8, 1), 'big')
+
+    # Leading '1' characters (digit value 0) stand for leading zero bytes
+    nPad = len(digits) - len(digits.lstrip(b'\x00'))
 
     result = bytes([0]) * nPad + result
     if length is not None and len(result) != length:
@@ -190,7 +262,7 @@ if HAS_ECDSA:
     def SecretToASecret(secret, compressed=False):
         """Convert secret to address secret format"""
         # This is a placeholder - would need full implementation for very old wallets
-        return secret.hex() if hasattr(secret, 'hex') else binascii.hexlify(secret).decode()
+        return secret.hex() if hasattr(secret, 'hex') else bytes(secret).hex()
     
     def PrivKeyToSecret(privkey):
         """Extract secret from private key"""
@@ -200,32 +272,47 @@ if HAS_ECDSA:
     def ASecretToSecret(sec):
         """Convert address secret to secret"""
         if isinstance(sec, str):
-            return binascii.unhexlify(sec)
+            return bytes.fromhex(sec)
         return sec
 
 
 class BCDataStream:
     """Bitcoin data stream parser with comprehensive legacy support"""
     
+    # Prebuilt structs, so reads don't reparse the format string or call calcsize
+    _S_I16 = struct.Struct('<h')
+    _S_U16 = struct.Struct('<H')
+    _S_I32 = struct.Struct('<i')
+    _S_U32 = struct.Struct('<I')
+    _S_I64 = struct.Struct('<q')
+    _S_U64 = struct.Struct('<Q')
+    
     def __init__(self):
         self.input = None
         self.read_cursor = 0
+        self._growable = False
 
     def clear(self):
         self.input = None
         self.read_cursor = 0
+        self._growable = False
 
     def write(self, bytes_data):
         if self.input is None:
+            # A single write (one per parsed record) keeps the caller's buffer without copying
             self.input = bytes_data
         else:
-            self.input += bytes_data
+            # Appends go to our own bytearray, amortized O(1) instead of recopying the whole buffer
+            if not self._growable:
+                self.input = bytearray(self.input)
+                self._growable = True
+            self.input.extend(bytes_data)
 
     def map_file(self, file, start):
         """Initialize with bytes from file"""
-        import mmap
         self.input = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
         self.read_cursor = start
+        self._growable = False
         
     def seek_file(self, position):
         self.read_cursor = position
@@ -242,6 +329,15 @@ class BCDataStream:
         except (IndexError, TypeError):
             raise SerializationError("attempt to read past end of buffer")
 
+    def read_view(self, length):
+        """Like read_bytes, but return a zero-copy memoryview for data that is consumed right away"""
+        end = self.read_cursor + length
+        if self.input is None or end > len(self.input):
+            raise SerializationError("attempt to read past end of buffer")
+        result = memoryview(self.input)[self.read_cursor:end]
+        self.read_cursor = end
+        return result
+
     def read_string(self):
         try:
             length = self.read_compact_size()
@@ -256,20 +352,20 @@ class BCDataStream:
     def read_boolean(self):
         return self.read_bytes(1)[0] != 0
 
-    def read_int16(self): return self._read_num('<h')
-    def read_uint16(self): return self._read_num('<H')
-    def read_int32(self): return self._read_num('<i')
-    def read_uint32(self): return self._read_num('<I')
-    def read_int64(self): return self._read_num('<q')
-    def read_uint64(self): return self._read_num('<Q')
+    def read_int16(self): return self._read_struct(self._S_I16, 2)
+    def read_uint16(self): return self._read_struct(self._S_U16, 2)
+    def read_int32(self): return self._read_struct(self._S_I32, 4)
+    def read_uint32(self): return self._read_struct(self._S_U32, 4)
+    def read_int64(self): return self._read_struct(self._S_I64, 8)
+    def read_uint64(self): return self._read_struct(self._S_U64, 8)
 
     def write_boolean(self, val): return self.write(bytes([1 if val else 0]))
-    def write_int16(self, val): return self._write_num('<h', val)
-    def write_uint16(self, val): return self._write_num('<H', val)
-    def write_int32(self, val): return self._write_num('<i', val)
-    def write_uint32(self, val): return self._write_num('<I', val)
-    def write_int64(self, val): return self._write_num('<q', val)
-    def write_uint64(self, val): return self._write_num('<Q', val)
+    def write_int16(self, val): return self.write(self._S_I16.pack(val))
+    def write_uint16(self, val): return self.write(self._S_U16.pack(val))
+    def write_int32(self, val): return self.write(self._S_I32.pack(val))
+    def write_uint32(self, val): return self.write(self._S_U32.pack(val))
+    def write_int64(self, val): return self.write(self._S_I64.pack(val))
+    def write_uint64(self, val): return self.write(self._S_U64.pack(val))
 
     def read_compact_size(self):
         if not self.input or self.read_cursor >= len(self.input):
@@ -281,11 +377,11 @@ class BCDataStream:
         self.read_cursor += 1
         
         if size == 253:
-            size = self._read_num('<H')
+            size = self.read_uint16()
         elif size == 254:
-            size = self._read_num('<I')
+            size = self.read_uint32()
         elif size == 255:
-            size = self._read_num('<Q')
+            size = self.read_uint64()
         return size
 
     def write_compact_size(self, size):
@@ -295,13 +391,21 @@ class BCDataStream:
             self.write(bytes([size]))
         elif size < 2 ** 16:
             self.write(b'\xfd')
-            self._write_num('<H', size)
+            self.write_uint16(size)
         elif size < 2 ** 32:
             self.write(b'\xfe')
-            self._write_num('<I', size)
+            self.write_uint32(size)
         elif size < 2 ** 64:
             self.write(b'\xff')
-            self._write_num('<Q', size)
+            self.write_uint64(size)
+
+    def _read_struct(self, st, size):
+        try:
+            (i,) = st.unpack_from(self.input, self.read_cursor)
+        except struct.error:
+            raise SerializationError("failed to read number")
+        self.read_cursor += size
+        return i
 
     def _read_num(self, format_str):
         try:
@@ -322,16 +426,25 @@ if HAS_ECDSA:
         def __init__(self):
             self.prikey = None
             self.pubkey = None
+            # coincurve counterparts, used for the EC operations when available
+            self._cc = None
+            self._cc_pub = None
+
+        def _set_cc_privkey(self):
+            if HAS_COINCURVE:
+                self._cc = coincurve.PrivateKey(self.prikey.to_string())
+                self._cc_pub = self._cc.public_key
 
         def generate(self, secret=None):
             if secret:
                 if isinstance(secret, str):
                     secret = secret.encode()
-                exp = int(binascii.hexlify(secret), 16)
+                exp = int.from_bytes(secret, 'big')
                 self.prikey = ecdsa.SigningKey.from_secret_exponent(exp, curve=secp256k1)
             else:
                 self.prikey = ecdsa.SigningKey.generate(curve=secp256k1)
             self.pubkey = self.prikey.get_verifying_key()
+            self._set_cc_privkey()
             return self.prikey.to_der()
 
         def set_privkey(self, key):
@@ -345,8 +458,12 @@ if HAS_ECDSA:
                 self.prikey = ecdsa.SigningKey.from_string(octet_str, curve=secp256k1)
             else:
                 self.prikey = ecdsa.SigningKey.from_der(key)
+            self._set_cc_privkey()
 
         def set_pubkey(self, key):
+            if HAS_COINCURVE:
+                self._cc_pub = coincurve.PublicKey(key)
+                return
             key = key[1:]
             self.pubkey = ecdsa.VerifyingKey.from_string(key, curve=secp256k1)
 
@@ -371,7 +488,7 @@ if HAS_ECDSA:
                 der.encode_integer(_r),
                 der.encode_integer(1),
             )
-            encoded_vk = b"\x00\x04" + self.pubkey.to_string()
+            encoded_vk = b"\x00" + self.get_pubkey()
             return der.encode_sequence(
                 der.encode_integer(1),
                 der.encode_octet_string(self.prikey.to_string()),
@@ -380,13 +497,24 @@ if HAS_ECDSA:
             )
 
         def get_pubkey(self):
+            if self._cc_pub is not None:
+                return self._cc_pub.format(compressed=False)
             return b"\x04" + self.pubkey.to_string()
 
         def sign(self, hash_data):
-            sig = self.prikey.sign_digest(hash_data, sigencode=ecdsa.util.sigencode_der)
-            return binascii.hexlify(sig).decode()
+            if self._cc is not None:
+                sig = self._cc.sign(hash_data, hasher=None)
+            else:
+                sig = self.prikey.sign_digest(hash_data, sigencode=ecdsa.util.sigencode_der)
+            return sig.hex()
 
         def verify(self, hash_data, sig):
+            if self._cc_pub is not None:
+                if self._cc_pub.verify(sig, hash_data, hasher=None):
+                    return True
+                # libsecp256k1 rejects high-S signatures, which ecdsa accepts, so let ecdsa decide
+                pubkey = ecdsa.VerifyingKey.from_string(self.get_pubkey()[1:], curve=secp256k1)
+                return pubkey.verify_digest(sig, hash_data, sigdecode=ecdsa.util.sigdecode_der)
             return self.pubkey.verify_digest(sig, hash_data, sigdecode=ecdsa.util.sigdecode_der)
 
 
@@ -412,7 +540,7 @@ def one_element_in(a, string):
     return False
 
 
-def first_read(device, size, prekeys, inc=10000):
+def first_read(device, size, prekeys, inc=Mio):
     """First pass reading to find key ranges"""
     t0 = ts() - 1
     try:
@@ -421,6 +549,16 @@ def first_read(device, size, prekeys, inc=10000):
         print(f"Can't open {device}, check the path or try as root", file=sys.stderr)
         return []
     
+    # The whole device is read front to back once: let the kernel read ahead aggressively
+    if hasattr(os, 'posix_fadvise'):
+        for advice in (os.POSIX_FADV_SEQUENTIAL, os.POSIX_FADV_WILLNEED):
+            try:
+                os.posix_fadvise(fd, 0, int(size), advice)
+            except OSError:
+                pass
+
+    # Progress is printed roughly every 10 MiB, on a chunk boundary
+    report_every = max(10 * Mio // inc, 1) * inc
     prekey = prekeys[0]
     data = b""
     i = 0
@@ -429,7 +567,7 @@ def first_read(device, size, prekeys, inc=10000):
     ranges = []
 
     while i < int(size):
-        if i % (10 * Mio) > 0 and i % (10 * Mio) <= inc:
+        if i and i % report_every == 0:
             print(f"\n{i / 1e9:.2f}/{size / 1e9:.2f} GB", file=sys.stderr)
             t = ts()
             speed = i / (t - t0)
@@ -456,6 +594,10 @@ def first_read(device, size, prekeys, inc=10000):
         before_contained_key = contains_key
         i += inc
 
+    # Close a range still open at the end of the device
+    if before_contained_key:
+        ranges.append(i)
+
     os.close(fd)
     return ranges
 
@@ -483,7 +625,7 @@ def shrink_intervals(device, ranges, prekeys, inc=1000):
             mini_blocks[2 * k] -= len(prekey) + 1
             mini_blocks[2 * k + 1] += len(prekey) + 1
 
-            bi = mini_blocks[2 * k]
+            bi = max(mini_blocks[2 * k], 0)
             bf = mini_blocks[2 * k + 1]
 
             os.lseek(fd, bi, 0)
@@ -508,21 +650,30 @@ def find_offsets(device, ranges, prekeys):
     list_offsets = []
     to_read = 0
     fd = os.open(device, os.O_RDONLY)
+    # (st_size is 0 for block devices, seeking to the end works for both)
+    device_size = os.lseek(fd, 0, os.SEEK_END)
     
     for i in range(len(ranges) // 2):
-        bi = ranges[2 * i] - len(prekey) - 1
-        os.lseek(fd, bi, 0)
+        bi = max(ranges[2 * i] - len(prekey) - 1, 0)
         bf = ranges[2 * i + 1] + len(prekey) + 1
         to_read += bf - bi + 1
-        buf = b"\x00" * len(prekey)
-        curs = bi
+        end = min(bf + 1, device_size)
+        if end <= bi:
+            continue
 
-        while curs <= bf:
-            data = os.read(fd, 1)
-            buf = buf[1:] + data
-            if buf in prekeys:
-                list_offsets.append(curs)
-            curs += 1
+        # Map the window (from an allocation-granularity aligned offset) instead of reading it
+        start = bi - bi % mmap.ALLOCATIONGRANULARITY
+        found = []
+        with mmap.mmap(fd, end - start, offset=start, access=mmap.ACCESS_READ) as mm:
+            if hasattr(mmap, "MADV_SEQUENTIAL"):
+                mm.madvise(mmap.MADV_SEQUENTIAL)
+            # Offsets are those of the last byte of each prekey found, in device order
+            for pk in prekeys:
+                pos = mm.find(pk, bi - start)
+                while pos != -1:
+                    found.append(start + pos + len(pk) - 1)
+                    pos = mm.find(pk, pos + 1)
+        list_offsets.extend(sorted(found))
 
     os.close(fd)
     return [to_read, list_offsets]
@@ -536,9 +687,8 @@ def read_keys(device, list_offsets):
     for offset in list_offsets:
         os.lseek(fd, offset + 1, 0)
         data = os.read(fd, 40)
-        hexkey = binascii.hexlify(data[1:33]).decode()
-        after_key = binascii.hexlify(data[33:39]).decode()
-        if hexkey not in found_hexkeys and check_postkeys(binascii.unhexlify(after_key), postkeys):
+        hexkey = data[1:33].hex()
+        if hexkey not in found_hexkeys and check_postkeys(data[33:39], postkeys):
             found_hexkeys.append(hexkey)
 
     os.close(fd)
@@ -583,7 +733,7 @@ def parse_BlockLocator(vds):
 
 def deserialize_BlockLocator(d):
     """Serialize block locator"""
-    result = "Block Locator top: " + binascii.hexlify(d['hashes'][0][::-1]).decode()
+    result = "Block Locator top: " + d['hashes'][0][::-1].hex()
     return result
 
 
@@ -602,21 +752,25 @@ def parse_setting(setting, vds):
 
 
 def inversetxid(txid):
-    """Reverse transaction ID byte order"""
+    """Reverse transaction ID byte order (accepts a hex string or the raw bytes)"""
+    if isinstance(txid, (bytes, bytearray)):
+        txid = txid.hex()
     if len(txid) != 64:
         print("Bad txid", file=sys.stderr)
         return "CORRUPTEDTXID:" + txid
-    new_txid = ""
-    for i in range(32):
-        new_txid += txid[62 - 2 * i]
-        new_txid += txid[62 - 2 * i + 1]
-    return new_txid
+    try:
+        return bytes.fromhex(txid)[::-1].hex()
+    except ValueError:
+        print("Bad txid", file=sys.stderr)
+        return "CORRUPTEDTXID:" + txid
 
 
 def open_wallet(wallet_path):
     """Open a Bitcoin wallet.dat file"""
     if not os.path.exists(wallet_path):
         raise FileNotFoundError(f"Wallet file not found: {wallet_path}")
+    if not HAS_BSDDB:
+        raise Exception("bsddb3 or bsddb package is required to open this wallet")
     
     db = DB()
     try:
@@ -628,29 +782,274 @@ def open_wallet(wallet_path):
         raise Exception(f"Database error: {e}")
 
 
+# Berkeley DB on-disk layout, enough to walk a read-only BTree (see db_page.h / dbmeta.h)
+_BDB_BTREE_MAGIC = 0x053162
+_BDB_P_IBTREE = 3       # internal btree page
+_BDB_P_LBTREE = 5       # leaf btree page
+_BDB_P_OVERFLOW = 7     # overflow page
+_BDB_B_KEYDATA = 1      # item types on leaf pages (0x80 flags a deleted item)
+_BDB_B_OVERFLOW = 3
+_BDB_PAGE_HEADER = 26   # lsn, pgno, prev/next pgno, entries, hf_offset, level, type
+
+
+def _mmap_wallet_records(wallet_path, subdb=b"main"):
+    """Read all (key, value) pairs of a wallet.dat BTree database straight from an mmap of the file
+
+    Raises ValueError for anything this reader does not handle (encrypted or
+    checksummed databases, on-page duplicates, unknown page types), so callers
+    can fall back to bsddb.
+    """
+    with open(wallet_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if len(mm) < 512:
+            raise ValueError("file too small to be a Berkeley DB database")
+        if struct.unpack_from('<I', mm, 12)[0] == _BDB_BTREE_MAGIC:
+            order = '<'
+        elif struct.unpack_from('>I', mm, 12)[0] == _BDB_BTREE_MAGIC:
+            order = '>'
+        else:
+            raise ValueError("not a Berkeley DB BTree file")
+        page_size = struct.unpack_from(order + 'I', mm, 20)[0]
+        encrypt_alg, metaflags = mm[24], mm[26]
+        if encrypt_alg or metaflags & 0x01:
+            raise ValueError("encrypted or checksummed Berkeley DB databases are not supported")
+        if page_size < 512 or len(mm) % page_size:
+            raise ValueError(f"bad page size {page_size}")
+        page_count = len(mm) // page_size
+
+        header = struct.Struct(order + 'IIIHHBB')   # pgno, prev, next, entries, hf_offset, level, type
+        u16 = struct.Struct(order + 'H')
+        u32 = struct.Struct(order + 'I')
+        overflow_ref = struct.Struct(order + 'II')  # pgno, tlen
+
+        def page(pgno):
+            if not 0 < pgno < page_count:
+                raise ValueError(f"page {pgno} out of range")
+            base = pgno * page_size
+            return (base,) + header.unpack_from(mm, base + 8)
+
+        def overflow(pgno, length):
+            parts = []
+            while pgno and length > 0:
+                base, _, _, next_pgno, _, used, _, ptype = page(pgno)
+                if ptype != _BDB_P_OVERFLOW:
+                    raise ValueError(f"expected an overflow page at {pgno}")
+                parts.append(mm[base + _BDB_PAGE_HEADER:base + _BDB_PAGE_HEADER + used])
+                length -= used
+                pgno = next_pgno
+            return b"".join(parts)
+
+        def records(meta_pgno):
+            # Descend the leftmost branch to the first leaf, then follow the leaf chain
+            pgno = u32.unpack_from(mm, meta_pgno * page_size + 88)[0]
+            base, _, _, next_pgno, entries, _, _, ptype = page(pgno)
+            while ptype == _BDB_P_IBTREE:
+                if not entries:
+                    raise ValueError(f"empty internal page {pgno}")
+                item = base + u16.unpack_from(mm, base + _BDB_PAGE_HEADER)[0]
+                pgno = u32.unpack_from(mm, item + 4)[0]
+                base, _, _, next_pgno, entries, _, _, ptype = page(pgno)
+            result = []
+            seen = set()
+            while True:
+                if ptype != _BDB_P_LBTREE:
+                    raise ValueError(f"unexpected page type {ptype} at {pgno}")
+                if pgno in seen:
+                    raise ValueError(f"leaf chain loops at {pgno}")
+                seen.add(pgno)
+                items = []
+                for i in range(entries):
+                    item = base + u16.unpack_from(mm, base + _BDB_PAGE_HEADER + 2 * i)[0]
+                    length, itype = u16.unpack_from(mm, item)[0], mm[item + 2]
+                    if itype & 0x7f == _BDB_B_KEYDATA:
+                        data = mm[item + 3:item + 3 + length]
+                    elif itype & 0x7f == _BDB_B_OVERFLOW:
+                        data = overflow(*overflow_ref.unpack_from(mm, item + 4))
+                    else:
+                        raise ValueError(f"unsupported item type {itype} at page {pgno}")
+                    items.append((data, itype & 0x80))
+                # Leaf entries alternate key, value; skip pairs flagged as deleted
+                for (key, key_deleted), (value, value_deleted) in zip(items[0::2], items[1::2]):
+                    if not (key_deleted or value_deleted):
+                        result.append((key, value))
+                if not next_pgno:
+                    return result
+                pgno = next_pgno
+                base, _, _, next_pgno, entries, _, _, ptype = page(pgno)
+
+        # Page 0 is the master database mapping sub-database names to their meta page
+        for name, meta in records(0):
+            if name == subdb:
+                # (sub-database meta page numbers are stored in network byte order)
+                return records(struct.unpack('>I', meta)[0])
+        raise ValueError(f"no {subdb.decode()} database in the file")
+
+
+# Fixed-width txin prefix: prevout hash and index
+_TXIN_PREVOUT = struct.Struct('<32sI')
+
+
+def _parse_TxIn(vds):
+    """Parse transaction input"""
+    try:
+        prevout_hash, prevout_n = _TXIN_PREVOUT.unpack_from(vds.input, vds.read_cursor)
+    except struct.error:
+        raise SerializationError("attempt to read past end of buffer")
+    vds.read_cursor += _TXIN_PREVOUT.size
+    d = {}
+    d['prevout_hash'] = prevout_hash.hex()
+    d['prevout_n'] = prevout_n
+    d['scriptSig'] = vds.read_view(vds.read_compact_size()).hex()
+    d['sequence'] = vds.read_uint32()
+    return d
+
+
+def _parse_TxOut(vds):
+    """Parse transaction output"""
+    d = {}
+    d['value'] = vds.read_int64() / 1e8
+    d['scriptPubKey'] = vds.read_view(vds.read_compact_size()).hex()
+    return d
+
+
+def _parse_tx(kds, vds, d):
+    d["tx_id"] = inversetxid(kds.read_bytes(32))
+    start = vds.read_cursor
+    d['version'] = vds.read_int32()
+    n_vin = vds.read_compact_size()
+    d['txIn'] = []
+    for i in range(n_vin):
+        d['txIn'].append(_parse_TxIn(vds))
+    n_vout = vds.read_compact_size()
+    d['txOut'] = []
+    for i in range(n_vout):
+        d['txOut'].append(_parse_TxOut(vds))
+    d['lockTime'] = vds.read_uint32()
+    d['tx'] = memoryview(vds.input)[start:vds.read_cursor].hex()
+    d['txv'] = d["__value__"].hex()
+    d['txk'] = d["__key__"].hex()
+
+
+def _parse_name(kds, vds, d):
+    d['hash'] = kds.read_string()
+    d['name'] = vds.read_string()
+
+
+def _parse_version(kds, vds, d):
+    d['version'] = vds.read_uint32()
+
+
+def _parse_minversion(kds, vds, d):
+    d['minversion'] = vds.read_uint32()
+
+
+def _parse_setting(kds, vds, d):
+    d['setting'] = kds.read_string()
+    if isinstance(d['setting'], bytes):
+        d['setting'] = d['setting'].decode('utf-8', errors='ignore')
+    d['value'] = parse_setting(d['setting'], vds)
+
+
+def _parse_key(kds, vds, d):
+    d['public_key'] = kds.read_bytes(kds.read_compact_size())
+    d['private_key'] = vds.read_bytes(vds.read_compact_size())
+
+
+def _parse_wkey(kds, vds, d):
+    d['public_key'] = kds.read_bytes(kds.read_compact_size())
+    d['private_key'] = vds.read_bytes(vds.read_compact_size())
+    d['created'] = vds.read_int64()
+    d['expires'] = vds.read_int64()
+    d['comment'] = vds.read_string()
+
+
+def _parse_defaultkey(kds, vds, d):
+    d['key'] = vds.read_bytes(vds.read_compact_size())
+
+
+def _parse_pool(kds, vds, d):
+    d['n'] = kds.read_int64()
+    d['nVersion'] = vds.read_int32()
+    d['nTime'] = vds.read_int64()
+    d['public_key'] = vds.read_bytes(vds.read_compact_size())
+
+
+def _parse_acc(kds, vds, d):
+    d['account'] = kds.read_string()
+    d['nVersion'] = vds.read_int32()
+    d['public_key'] = vds.read_bytes(vds.read_compact_size())
+
+
+def _parse_acentry(kds, vds, d):
+    d['account'] = kds.read_string()
+    d['n'] = kds.read_uint64()
+    d['nVersion'] = vds.read_int32()
+    d['nCreditDebit'] = vds.read_int64()
+    d['nTime'] = vds.read_int64()
+    d['otherAccount'] = vds.read_string()
+    d['comment'] = vds.read_string()
+
+
+def _parse_bestblock(kds, vds, d):
+    d['nVersion'] = vds.read_int32()
+    # d.update(parse_BlockLocator(vds))
+
+
+def _parse_ckey(kds, vds, d):
+    d['public_key'] = kds.read_bytes(kds.read_compact_size())
+    d['encrypted_private_key'] = vds.read_bytes(vds.read_compact_size())
+
+
+def _parse_mkey(kds, vds, d):
+    d['nID'] = kds.read_uint32()
+    d['encrypted_key'] = vds.read_string()
+    d['salt'] = vds.read_string()
+    d['nDerivationMethod'] = vds.read_uint32()
+    d['nDerivationIterations'] = vds.read_uint32()
+    d['otherParams'] = vds.read_string()
+
+
+# Record type -> parser filling in the record dict from the key/value streams
+_PARSERS = {
+    "tx": _parse_tx,
+    "name": _parse_name,
+    "version": _parse_version,
+    "minversion": _parse_minversion,
+    "setting": _parse_setting,
+    "key": _parse_key,
+    "wkey": _parse_wkey,
+    "defaultkey": _parse_defaultkey,
+    "pool": _parse_pool,
+    "acc": _parse_acc,
+    "acentry": _parse_acentry,
+    "bestblock": _parse_bestblock,
+    "ckey": _parse_ckey,
+    "mkey": _parse_mkey,
+}
+
+
 def parse_wallet(db, item_callback):
     """Parse wallet database with comprehensive record type support"""
+    _parse_records(db.items(), item_callback)
+
+
+def _mmap_parse_wallet(wallet_path, item_callback):
+    """Parse a wallet.dat without bsddb, returning False (before any callback) if it can't be read directly"""
+    try:
+        records = _mmap_wallet_records(wallet_path)
+    except (OSError, ValueError, struct.error, IndexError) as e:
+        logging.debug("Reading %s through bsddb: %s", wallet_path, e)
+        return False
+    _parse_records(records, item_callback)
+    return True
+
+
+def _parse_records(records, item_callback):
+    """Parse (key, value) wallet records, passing each to item_callback"""
     kds = BCDataStream()
     vds = BCDataStream()
 
-    def parse_TxIn(vds):
-        """Parse transaction input"""
-        d = {}
-        d['prevout_hash'] = binascii.hexlify(vds.read_bytes(32)).decode()
-        d['prevout_n'] = vds.read_uint32()
-        d['scriptSig'] = binascii.hexlify(vds.read_bytes(vds.read_compact_size())).decode()
-        d['sequence'] = vds.read_uint32()
-        return d
-
-    def parse_TxOut(vds):
-        """Parse transaction output"""
-        d = {}
-        d['value'] = vds.read_int64() / 1e8
-        d['scriptPubKey'] = binascii.hexlify(vds.read_bytes(vds.read_compact_size())).decode()
-        return d
-
     try:
-        for (key, value) in db.items():
+        for (key, value) in records:
             d = {}
 
             kds.clear()
@@ -667,94 +1066,15 @@ def parse_wallet(db, item_callback):
                 d["__value__"] = value
                 d["__type__"] = record_type
 
-                if record_type == "tx":
-                    d["tx_id"] = inversetxid(binascii.hexlify(kds.read_bytes(32)).decode())
-                    start = vds.read_cursor
-                    d['version'] = vds.read_int32()
-                    n_vin = vds.read_compact_size()
-                    d['txIn'] = []
-                    for i in range(n_vin):
-                        d['txIn'].append(parse_TxIn(vds))
-                    n_vout = vds.read_compact_size()
-                    d['txOut'] = []
-                    for i in range(n_vout):
-                        d['txOut'].append(parse_TxOut(vds))
-                    d['lockTime'] = vds.read_uint32()
-                    d['tx'] = binascii.hexlify(vds.input[start:vds.read_cursor]).decode()
-                    d['txv'] = binascii.hexlify(value).decode()
-                    d['txk'] = binascii.hexlify(key).decode()
-                    
-                elif record_type == "name":
-                    d['hash'] = kds.read_string()
-                    d['name'] = vds.read_string()
-                    
-                elif record_type == "version":
-                    d['version'] = vds.read_uint32()
-                    
-                elif record_type == "minversion":
-                    d['minversion'] = vds.read_uint32()
-                    
-                elif record_type == "setting":
-                    d['setting'] = kds.read_string()
-                    if isinstance(d['setting'], bytes):
-                        d['setting'] = d['setting'].decode('utf-8', errors='ignore')
-                    d['value'] = parse_setting(d['setting'], vds)
-                    
-                elif record_type == "key":
-                    d['public_key'] = kds.read_bytes(kds.read_compact_size())
-                    d['private_key'] = vds.read_bytes(vds.read_compact_size())
-                    
-                elif record_type == "wkey":
-                    d['public_key'] = kds.read_bytes(kds.read_compact_size())
-                    d['private_key'] = vds.read_bytes(vds.read_compact_size())
-                    d['created'] = vds.read_int64()
-                    d['expires'] = vds.read_int64()
-                    d['comment'] = vds.read_string()
-                    
-                elif record_type == "defaultkey":
-                    d['key'] = vds.read_bytes(vds.read_compact_size())
-                    
-                elif record_type == "pool":
-                    d['n'] = kds.read_int64()
-                    d['nVersion'] = vds.read_int32()
-                    d['nTime'] = vds.read_int64()
-                    d['public_key'] = vds.read_bytes(vds.read_compact_size())
-                    
-                elif record_type == "acc":
-                    d['account'] = kds.read_string()
-                    d['nVersion'] = vds.read_int32()
-                    d['public_key'] = vds.read_bytes(vds.read_compact_size())
-                    
-                elif record_type == "acentry":
-                    d['account'] = kds.read_string()
-                    d['n'] = kds.read_uint64()
-                    d['nVersion'] = vds.read_int32()
-                    d['nCreditDebit'] = vds.read_int64()
-                    d['nTime'] = vds.read_int64()
-                    d['otherAccount'] = vds.read_string()
-                    d['comment'] = vds.read_string()
-                    
-                elif record_type == "bestblock":
-                    d['nVersion'] = vds.read_int32()
-                    # d.update(parse_BlockLocator(vds))
-                    
-                elif record_type == "ckey":
-                    d['public_key'] = kds.read_bytes(kds.read_compact_size())
-                    d['encrypted_private_key'] = vds.read_bytes(vds.read_compact_size())
-                    
-                elif record_type == "mkey":
-                    d['nID'] = kds.read_uint32()
-                    d['encrypted_key'] = vds.read_string()
-                    d['salt'] = vds.read_string()
-                    d['nDerivationMethod'] = vds.read_uint32()
-                    d['nDerivationIterations'] = vds.read_uint32()
-                    d['otherParams'] = vds.read_string()
+                parser = _PARSERS.get(record_type)
+                if parser:
+                    parser(kds, vds, d)
 
                 item_callback(record_type, d)
 
             except (SerializationError, struct.error, UnicodeDecodeError) as e:
                 # Skip corrupted records
-                logging.debug(f"Skipping corrupted record: {e}")
+                logging.debug("Skipping corrupted record: %s", e)
                 continue
                 
     except Exception as e:
@@ -775,189 +1095,229 @@ def read_wallet(json_db, walletfile, print_wallet=False, print_wallet_transactio
         oldaddrtype = addrtype
         addrtype = vers
 
-    db = open_wallet(walletfile)
-
     json_db['keys'] = []
     json_db['pool'] = []
     json_db['tx'] = []
     json_db['names'] = {}
     json_db['ckey'] = []
     json_db['mkey'] = {}
-
-    def item_callback(record_type, d):
-        if record_type == "tx":
-            json_db['tx'].append({
-                "tx_id": d['tx_id'], 
-                "txin": d['txIn'], 
-                "txout": d['txOut'], 
-                "tx_v": d['txv'], 
-                "tx_k": d['txk']
-            })
-
-        elif record_type == "name":
-            hash_key = d['hash']
-            if isinstance(hash_key, bytes):
-                hash_key = hash_key.decode('utf-8', errors='ignore')
-            name_val = d['name']
-            if isinstance(name_val, bytes):
-                name_val = name_val.decode('utf-8', errors='ignore')
-            json_db['names'][hash_key] = name_val
-
-        elif record_type == "version":
-            json_db['version'] = d['version']
-
-        elif record_type == "minversion":
-            json_db['minversion'] = d['minversion']
-
-        elif record_type == "setting":
-            if 'settings' not in json_db:
-                json_db['settings'] = {}
-            json_db["settings"][d['setting']] = d['value']
-
-        elif record_type == "defaultkey":
-            json_db['defaultkey'] = public_key_to_bc_address(d['key'])
-
-        elif record_type == "key":
-            addr = public_key_to_bc_address(d['public_key'])
-            compressed = d['public_key'][0] != 4  # 0x04 for uncompressed
-            
-            if HAS_ECDSA:
-                try:
-                    sec = SecretToASecret(PrivKeyToSecret(d['private_key']), compressed)
-                    hexsec = ASecretToSecret(sec)
-                    if isinstance(hexsec, bytes):
-                        hexsec = binascii.hexlify(hexsec).decode()
-                    elif not isinstance(hexsec, str):
-                        hexsec = str(hexsec)
-                    private_keys.append(sec)
-                except:
-                    hexsec = binascii.hexlify(d['private_key']).decode()
-            else:
-                hexsec = binascii.hexlify(d['private_key']).decode()
-                
-            json_db['keys'].append({
-                'addr': addr, 
-                'sec': sec if HAS_ECDSA and 'sec' in locals() else 'N/A', 
-                'hexsec': hexsec, 
-                'secret': hexsec, 
-                'pubkey': binascii.hexlify(d['public_key']).decode(), 
-                'compressed': compressed, 
-                'private': binascii.hexlify(d['private_key']).decode()
-            })
-
-        elif record_type == "wkey":
-            if 'wkey' not in json_db:
-                json_db['wkey'] = {}
-            json_db['wkey']['created'] = d['created']
-
-        elif record_type == "pool":
+    # Hex encrypted private keys in wallet order, so the john hash doesn't have to search 'keys'
+    json_db['encrypted_keys'] = []
+
+    # (target dict, field, public key) for addresses derived in one batch after parsing
+    pending_addrs = []
+
+    def on_tx(d):
+        json_db['tx'].append({
+            "tx_id": d['tx_id'], 
+            "txin": d['txIn'], 
+            "txout": d['txOut'], 
+            "tx_v": d['txv'], 
+            "tx_k": d['txk']
+        })
+
+    def on_name(d):
+        hash_key = d['hash']
+        if isinstance(hash_key, bytes):
+            hash_key = hash_key.decode('utf-8', errors='ignore')
+        name_val = d['name']
+        if isinstance(name_val, bytes):
+            name_val = name_val.decode('utf-8', errors='ignore')
+        json_db['names'][hash_key] = name_val
+
+    def on_version(d):
+        json_db['version'] = d['version']
+
+    def on_minversion(d):
+        json_db['minversion'] = d['minversion']
+
+    def on_setting(d):
+        if 'settings' not in json_db:
+            json_db['settings'] = {}
+        json_db["settings"][d['setting']] = d['value']
+
+    def on_defaultkey(d):
+        json_db['defaultkey'] = None
+        pending_addrs.append((json_db, 'defaultkey', d['key']))
+
+    def on_key(d):
+        compressed = d['public_key'][0] != 4  # 0x04 for uncompressed
+        private_hex = d['private_key'].hex()
+
+        if HAS_ECDSA:
             try:
-                addr = public_key_to_bc_address(d['public_key'])
-                json_db['pool'].append({
-                    'n': d['n'], 
-                    'addr': addr, 
-                    'nTime': d['nTime'], 
-                    'nVersion': d['nVersion'], 
-                    'public_key_hex': binascii.hexlify(d['public_key']).decode()
-                })
+                sec = SecretToASecret(PrivKeyToSecret(d['private_key']), compressed)
+                hexsec = ASecretToSecret(sec)
+                if isinstance(hexsec, bytes):
+                    hexsec = hexsec.hex()
+                elif not isinstance(hexsec, str):
+                    hexsec = str(hexsec)
+                private_keys.append(sec)
             except:
-                json_db['pool'].append({
-                    'n': d['n'], 
-                    'nTime': d['nTime'], 
-                    'nVersion': d['nVersion'], 
-                    'public_key_hex': binascii.hexlify(d['public_key']).decode()
-                })
-
-        elif record_type == "acc":
-            json_db['acc'] = d['account']
-            if isinstance(d['account'], bytes):
-                json_db['acc'] = d['account'].decode('utf-8', errors='ignore')
-
-        elif record_type == "acentry":
-            account = d['account']
-            if isinstance(account, bytes):
-                account = account.decode('utf-8', errors='ignore')
-            other_account = d['otherAccount']
-            if isinstance(other_account, bytes):
-                other_account = other_account.decode('utf-8', errors='ignore')
-            comment = d['comment']
-            if isinstance(comment, bytes):
-                comment = comment.decode('utf-8', errors='ignore')
-                
-            json_db['acentry'] = (
-                account, d['nCreditDebit'], other_account, 
-                time.ctime(d['nTime']), d['n'], comment
-            )
+                hexsec = private_hex
+        else:
+            hexsec = private_hex
+
+        json_db['keys'].append({
+            'addr': None, 
+            'sec': sec if HAS_ECDSA and 'sec' in locals() else 'N/A', 
+            'hexsec': hexsec, 
+            'secret': hexsec, 
+            'pubkey': d['public_key'].hex(), 
+            'compressed': compressed, 
+            'private': private_hex
+        })
+        pending_addrs.append((json_db['keys'][-1], 'addr', d['public_key']))
+
+    def on_wkey(d):
+        if 'wkey' not in json_db:
+            json_db['wkey'] = {}
+        json_db['wkey']['created'] = d['created']
+
+    def on_pool(d):
+        json_db['pool'].append({
+            'n': d['n'], 
+            'addr': None, 
+            'nTime': d['nTime'], 
+            'nVersion': d['nVersion'], 
+            'public_key_hex': d['public_key'].hex()
+        })
+        pending_addrs.append((json_db['pool'][-1], 'addr', d['public_key']))
+
+    def on_acc(d):
+        json_db['acc'] = d['account']
+        if isinstance(d['account'], bytes):
+            json_db['acc'] = d['account'].decode('utf-8', errors='ignore')
+
+    def on_acentry(d):
+        account = d['account']
+        if isinstance(account, bytes):
+            account = account.decode('utf-8', errors='ignore')
+        other_account = d['otherAccount']
+        if isinstance(other_account, bytes):
+            other_account = other_account.decode('utf-8', errors='ignore')
+        comment = d['comment']
+        if isinstance(comment, bytes):
+            comment = comment.decode('utf-8', errors='ignore')
+
+        json_db['acentry'] = (
+            account, d['nCreditDebit'], other_account, 
+            time.ctime(d['nTime']), d['n'], comment
+        )
+
+    def on_bestblock(d):
+        pass
+
+    def on_ckey(d):
+        nonlocal crypted
+        crypted = True
+        compressed = d['public_key'][0] != 4  # 0x04 for uncompressed
+        # (one hex string shared by the three fields that carry the encrypted key)
+        encrypted_hex = d['encrypted_private_key'].hex()
+        json_db['keys'].append({
+            'addr': None, 
+            'sec': 'Encrypted', 
+            'hexsec': encrypted_hex, 
+            'secret': encrypted_hex, 
+            'pubkey': d['public_key'].hex(), 
+            'encrypted_private_key': encrypted_hex, 
+            'compressed': compressed
+        })
+        json_db['encrypted_keys'].append(encrypted_hex)
+        pending_addrs.append((json_db['keys'][-1], 'addr', d['public_key']))
+
+    def on_mkey(d):
+        json_db['mkey'] = {
+            'nID': d['nID'],
+            'salt': d['salt'].hex(),
+            'nDerivationIterations': d['nDerivationIterations'],
+            'nDerivationMethod': d['nDerivationMethod'],
+            'encrypted_key': d['encrypted_key'].hex(),
+            'otherParams': d['otherParams'].hex() if d['otherParams'] else ''
+        }
+
+    handlers = {
+        "tx": on_tx,
+        "name": on_name,
+        "version": on_version,
+        "minversion": on_minversion,
+        "setting": on_setting,
+        "defaultkey": on_defaultkey,
+        "key": on_key,
+        "wkey": on_wkey,
+        "pool": on_pool,
+        "acc": on_acc,
+        "acentry": on_acentry,
+        "bestblock": on_bestblock,
+        "ckey": on_ckey,
+        "mkey": on_mkey,
+    }
 
-        elif record_type == "bestblock":
-            pass
-
-        elif record_type == "ckey":
-            crypted = True
-            compressed = d['public_key'][0] != 4  # 0x04 for uncompressed
-            json_db['keys'].append({
-                'addr': public_key_to_bc_address(d['public_key']), 
-                'sec': 'Encrypted', 
-                'hexsec': binascii.hexlify(d['encrypted_private_key']).decode(), 
-                'secret': binascii.hexlify(d['encrypted_private_key']).decode(), 
-                'pubkey': binascii.hexlify(d['public_key']).decode(), 
-                'encrypted_private_key': binascii.hexlify(d['encrypted_private_key']).decode(), 
-                'compressed': compressed
-            })
-
-        elif record_type == "mkey":
-            json_db['mkey'] = {
-                'nID': d['nID'],
-                'salt': binascii.hexlify(d['salt']).decode(),
-                'nDerivationIterations': d['nDerivationIterations'],
-                'nDerivationMethod': d['nDerivationMethod'],
-                'encrypted_key': binascii.hexlify(d['encrypted_key']).decode(),
-                'otherParams': binascii.hexlify(d['otherParams']).decode() if d['otherParams'] else ''
-            }
-
-    parse_wallet(db, item_callback)
-    db.close()
+    def item_callback(record_type, d):
+        handler = handlers.get(record_type)
+        if handler:
+            handler(d)
+
+    if not _mmap_parse_wallet(walletfile, item_callback):
+        db = open_wallet(walletfile)
+        parse_wallet(db, item_callback)
+        db.close()
+
+    # Derive all addresses in one pass, since wallets repeat public keys across key/ckey/pool/defaultkey records
+    addr_by_pubkey = derive_address_map(public_key for _, _, public_key in pending_addrs)
+    for target, field, public_key in pending_addrs:
+        target[field] = addr_by_pubkey[public_key]
     
-    if crypted:
-        return json_db
-    else:
-        return None
+    json_db['_encrypted'] = crypted
+    return json_db
 
 
-def generate_john_hash(wallet_path, wallet_data):
-    """Generate John the Ripper compatible hash"""
-    if not wallet_data or 'mkey' not in wallet_data or not wallet_data['mkey']:
+def generate_john_hash(wallet_path, wallet_data, wallet_name=None):
+    """Generate John the Ripper compatible hash (wallet_name defaults to the basename of wallet_path)"""
+    mkey = wallet_data.get('mkey') if wallet_data else None
+    if not mkey:
         return None
     
-    mkey = wallet_data['mkey']
-    
     # Find the first encrypted private key
     if 'keys' not in wallet_data or not wallet_data['keys']:
         return None
     
-    encrypted_key = None
-    for key_data in wallet_data['keys']:
-        if 'encrypted_private_key' in key_data:
-            encrypted_key = key_data['encrypted_private_key']
-            break
-    
+    if wallet_data.get('encrypted_keys'):
+        encrypted_key = wallet_data['encrypted_keys'][0]
+    else:
+        encrypted_key = next((key_data['encrypted_private_key'] for key_data in wallet_data['keys']
+                              if 'encrypted_private_key' in key_data), None)
     if not encrypted_key:
         return None
     
     # Create John the Ripper hash format
     # Format: $bitcoin$encrypted_key_len$encrypted_key$salt_len$salt$iterations$encrypted_private_key_len$encrypted_private_key$derivation_method
-    john_hash = (
-        f"$bitcoin${len(mkey['encrypted_key'])//2}${mkey['encrypted_key']}"
-        f"${len(mkey['salt'])//2}${mkey['salt']}"
-        f"${mkey['nDerivationIterations']}"
-        f"${len(encrypted_key)//2}${encrypted_key}"
-        f"${mkey['nDerivationMethod']}"
-    )
+    # (the leading empty field produces the initial '$')
+    john_hash = '$'.join([
+        '', 'bitcoin',
+        str(len(mkey['encrypted_key']) // 2), mkey['encrypted_key'],
+        str(len(mkey['salt']) // 2), mkey['salt'],
+        str(mkey['nDerivationIterations']),
+        str(len(encrypted_key) // 2), encrypted_key,
+        str(mkey['nDerivationMethod'])
+    ])
     
-    wallet_name = os.path.basename(wallet_path)
+    if wallet_name is None:
+        wallet_name = os.path.basename(wallet_path)
     return f"{wallet_name}:{john_hash}"
 
 
+def _write_stdout_line(line):
+    """Write a line straight to stdout's binary buffer (print() when there is none, e.g. a StringIO)"""
+    out = getattr(sys.stdout, 'buffer', None)
+    if out is None:
+        print(line)
+        return
+    sys.stdout.flush()  # keep ordering with anything already printed
+    out.write(line.encode(sys.stdout.encoding or 'utf-8', getattr(sys.stdout, 'errors', None) or 'strict') + b'\n')
+    out.flush()
+
+
 def bitcoin2john(wallet_path, output_file=None):
     """
     Convert Bitcoin wallet to John the Ripper format with comprehensive legacy support
@@ -971,11 +1331,13 @@ def bitcoin2john(wallet_path, output_file=None):
     """
     try:
         # Read and parse wallet
-        wallet_data = {}
-        result_data = read_wallet(wallet_data, wallet_path, False, False, "", False, -1, False)
+        wallet_data = read_wallet({}, wallet_path, False, False, "", False, -1, False)
+        if not wallet_data.get('_encrypted'):
+            print("No encrypted keys found in wallet", file=sys.stderr)
+            return None
         
         # Generate John hash
-        john_hash = generate_john_hash(wallet_path, result_data if result_data else wallet_data)
+        john_hash = generate_john_hash(wallet_path, wallet_data, os.path.basename(wallet_path))
         
         if john_hash is None:
             print("No encrypted keys found in wallet", file=sys.stderr)
@@ -983,17 +1345,18 @@ def bitcoin2john(wallet_path, output_file=None):
         
         # Output hash
         if output_file:
-            with open(output_file, 'w') as f:
-                f.write(john_hash + '\n')
+            with open(output_file, 'wb') as f:
+                f.write(john_hash.encode('utf-8') + b'\n')
             print(f"Hash written to: {output_file}")
         else:
-            print(john_hash)
+            _write_stdout_line(john_hash)
         
         return john_hash
         
     except Exception as e:
         print(f"Error processing wallet: {e}", file=sys.stderr)
-        logging.debug(f"Full error: {traceback.format_exc()}")
+        if logging.getLogger().isEnabledFor(logging.DEBUG):
+            logging.debug("Full error: %s", traceback.format_exc())
         return None
 
 
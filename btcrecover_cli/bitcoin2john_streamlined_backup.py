@@ -16,14 +16,13 @@ import logging
 import struct
 import traceback
 import hashlib
-import binascii
 from pathlib import Path
 
 try:
-    from bsddb3.db import *
+    from bsddb3.db import DB, DB_BTREE, DB_RDONLY, DB_THREAD, DBError
 except ImportError:
     try:
-        from bsddb.db import *
+        from bsddb.db import DB, DB_BTREE, DB_RDONLY, DB_THREAD, DBError
     except ImportError:
         print("Error: bsddb3 or bsddb package is required", file=sys.stderr)
         sys.exit(1)
@@ -34,6 +33,38 @@ class SerializationError(Exception):
     pass
 
 
+_U16 = struct.Struct('<H')
+_U32 = struct.Struct('<I')
+_U64 = struct.Struct('<Q')
+
+
+def _compact(mv, off):
+    """Read a compact size at off, returning (size, new_offset)"""
+    b = mv[off]
+    off += 1
+    if b < 253:
+        return b, off
+    elif b == 253:
+        return _U16.unpack_from(mv, off)[0], off + 2
+    elif b == 254:
+        return _U32.unpack_from(mv, off)[0], off + 4
+    return _U64.unpack_from(mv, off)[0], off + 8
+
+
+def _read_string(mv, off):
+    """Read a compact size prefixed string at off, returning (bytes, new_offset)"""
+    size, off = _compact(mv, off)
+    end = off + size
+    if end > len(mv):
+        raise SerializationError("attempt to read past end of buffer")
+    return mv[off:end].tobytes(), end
+
+
+def _read_u32(mv, off):
+    """Read a little-endian uint32 at off, returning (int, new_offset)"""
+    return _U32.unpack_from(mv, off)[0], off + 4
+
+
 class BCDataStream:
     """Bitcoin data stream parser"""
     
@@ -46,18 +77,16 @@ class BCDataStream:
         self.read_cursor = 0
 
     def write(self, bytes_data):
-        if self.input is None:
-            self.input = bytes_data
-        else:
-            self.input += bytes_data
+        """Set the buffer to read from (single-shot; callers clear() first)"""
+        self.input = bytes_data
 
     def read_bytes(self, length):
-        try:
-            result = self.input[self.read_cursor:self.read_cursor + length]
-            self.read_cursor += length
-            return result
-        except (IndexError, TypeError):
+        end = self.read_cursor + length
+        if self.input is None or end > len(self.input):
             raise SerializationError("attempt to read past end of buffer")
+        result = self.input[self.read_cursor:end]
+        self.read_cursor = end
+        return result
 
     def read_string(self):
         try:
@@ -101,6 +130,16 @@ def open_wallet(wallet_path):
         raise FileNotFoundError(f"Wallet file not found: {wallet_path}")
     
     db = DB()
+    # A larger cache avoids heavy page-in traffic on big wallets (BTCR_BDB_CACHE_MB to tune it)
+    try:
+        cache_mb = int(os.environ.get("BTCR_BDB_CACHE_MB", 64))
+    except ValueError:
+        cache_mb = 64
+    try:
+        db.set_cachesize(0, cache_mb << 20, 1)
+    except DBError:
+        pass
+    
     try:
         result = db.open(wallet_path, "main", DB_BTREE, DB_RDONLY | DB_THREAD)
         if result is not None:
@@ -110,6 +149,18 @@ def open_wallet(wallet_path):
         raise Exception(f"Database error: {e}")
 
 
+def _iter_records(db):
+    """Yield (key, value) pairs from a BDB cursor one record at a time"""
+    cur = db.cursor()
+    try:
+        rec = cur.first()
+        while rec is not None:
+            yield rec
+            rec = cur.next()
+    finally:
+        cur.close()
+
+
 def parse_wallet_data(db):
     """Parse wallet data and extract encryption information"""
     wallet_data = {
@@ -117,30 +168,31 @@ def parse_wallet_data(db):
         'ckeys': [],
         'encrypted': False
     }
-    
-    kds = BCDataStream()
-    vds = BCDataStream()
+    have_mkey = False
+    have_ckey = False
     
     try:
-        for key, value in db.items():
-            kds.clear()
-            kds.write(key)
-            vds.clear() 
-            vds.write(value)
+        for key, value in _iter_records(db):
+            # Fast reject: a 4 char record type is prefixed by its compact size byte 0x04
+            if not (key.startswith(b"\x04mkey") or key.startswith(b"\x04ckey")):
+                continue
+            
+            kv = memoryview(key)
+            vv = memoryview(value)
             
             try:
-                record_type = kds.read_string()
-                if isinstance(record_type, bytes):
-                    record_type = record_type.decode('utf-8', errors='ignore')
+                # (the prefix check above means the type is always the 4 bytes after the size byte)
+                record_type = key[1:5]
+                koff = 5
                 
-                if record_type == "mkey":
+                if record_type == b"mkey":
                     # Master key record
-                    nID = kds.read_uint32()
-                    encrypted_key = vds.read_string()
-                    salt = vds.read_string()
-                    derivation_method = vds.read_uint32()
-                    derivation_iterations = vds.read_uint32()
-                    other_params = vds.read_string()
+                    nID, koff = _read_u32(kv, koff)
+                    encrypted_key, voff = _read_string(vv, 0)
+                    salt, voff = _read_string(vv, voff)
+                    derivation_method, voff = _read_u32(vv, voff)
+                    derivation_iterations, voff = _read_u32(vv, voff)
+                    other_params, voff = _read_string(vv, voff)
                     
                     wallet_data['mkey'] = {
                         'nID': nID,
@@ -151,18 +203,20 @@ def parse_wallet_data(db):
                         'other_params': other_params
                     }
                     wallet_data['encrypted'] = True
+                    have_mkey = True
                     
-                elif record_type == "ckey":
-                    # Encrypted private key
-                    public_key = kds.read_bytes(kds.read_compact_size())
-                    encrypted_private_key = vds.read_bytes(vds.read_compact_size())
+                elif record_type == b"ckey":
+                    # Encrypted private key (the public key is not needed for the hash)
+                    encrypted_private_key, voff = _read_string(vv, 0)
                     
-                    wallet_data['ckeys'].append({
-                        'public_key': public_key,
-                        'encrypted_private_key': encrypted_private_key
-                    })
+                    wallet_data['ckeys'].append(encrypted_private_key)
+                    have_ckey = True
+                
+                # Only the master key and the first encrypted key are used
+                if have_mkey and have_ckey:
+                    break
                     
-            except (SerializationError, struct.error, UnicodeDecodeError) as e:
+            except (SerializationError, struct.error, IndexError) as e:
                 # Skip corrupted records
                 logging.debug(f"Skipping corrupted record: {e}")
                 continue
@@ -185,22 +239,24 @@ def generate_john_hash(wallet_path, wallet_data):
     if not wallet_data['ckeys']:
         return None
     
-    ckey = wallet_data['ckeys'][0]  # Use first encrypted key
+    ckey_enc = wallet_data['ckeys'][0]  # Use first encrypted key
     
     # Convert binary data to hex strings
-    encrypted_key_hex = binascii.hexlify(mkey['encrypted_key']).decode('ascii')
-    salt_hex = binascii.hexlify(mkey['salt']).decode('ascii')
-    encrypted_private_key_hex = binascii.hexlify(ckey['encrypted_private_key']).decode('ascii')
+    encrypted_key_hex = mkey['encrypted_key'].hex()
+    salt_hex = mkey['salt'].hex()
+    encrypted_private_key_hex = ckey_enc.hex()
     
     # Create John the Ripper hash format
     # Format: $bitcoin$length$encrypted_key$salt_length$salt$iterations$encrypted_private_key_length$encrypted_private_key$derivation_method
-    john_hash = (
-        f"$bitcoin${len(encrypted_key_hex)//2}${encrypted_key_hex}"
-        f"${len(salt_hex)//2}${salt_hex}"
-        f"${mkey['derivation_iterations']}"
-        f"${len(encrypted_private_key_hex)//2}${encrypted_private_key_hex}"
-        f"${mkey['derivation_method']}"
-    )
+    # (the leading empty field produces the initial '$')
+    john_hash = '$'.join([
+        '', 'bitcoin',
+        str(len(encrypted_key_hex) // 2), encrypted_key_hex,
+        str(len(salt_hex) // 2), salt_hex,
+        str(mkey['derivation_iterations']),
+        str(len(encrypted_private_key_hex) // 2), encrypted_private_key_hex,
+        str(mkey['derivation_method'])
+    ])
     
     wallet_name = os.path.basename(wallet_path)
     return f"{wallet_name}:{john_hash}"
@@ -232,8 +288,7 @@ def bitcoin2john(wallet_path, output_file=None):
         
         # Output hash
         if output_file:
-            with open(output_file, 'w') as f:
-                f.write(john_hash + '\n')
+            Path(output_file).write_text(john_hash + '\n', encoding='ascii')
             print(f"Hash written to: {output_file}")
         else:
             print(john_hash)
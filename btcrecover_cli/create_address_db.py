@@ -3,6 +3,7 @@
 Direct create-address-db.py entry point for CLI compatibility
 """
 
+import os
 import sys
 import subprocess
 from pathlib import Path
@@ -19,6 +20,10 @@ def main():
     cmd = [sys.executable, str(script_path)] + sys.argv[1:]
     
     try:
+        if os.name == "posix":
+            # Nothing runs after the child exits, so replace this process instead of forking
+            os.chdir(script_path.parent)
+            os.execv(sys.executable, cmd)
         result = subprocess.run(cmd, cwd=script_path.parent)
         return result.returncode
     except KeyboardInterrupt:
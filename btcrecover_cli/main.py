@@ -1,106 +1,80 @@
 #!/usr/bin/env python3
 
-import argparse
 import sys
 import os
-import subprocess
-from pathlib import Path
+import functools
+
+# Location of the original btcrecover scripts, resolved once at import (plain
+# strings, so startup doesn't pay for importing pathlib)
+_SCRIPT_ROOT = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+_SCRIPTS = {
+    name: os.path.join(_SCRIPT_ROOT, f"{name}.py")
+    for name in ("btcrecover", "seedrecover", "seedrecover_batch", "create-address-db", "check-address-db")
+}
 
 def get_script_path():
     """Get the path to the btcrecover scripts"""
-    current_dir = Path(__file__).parent.parent
-    return current_dir
-
-def run_btcrecover(args):
-    """Run the btcrecover.py script with provided arguments"""
-    script_path = get_script_path() / "btcrecover.py"
-    if not script_path.exists():
-        print(f"Error: btcrecover.py not found at {script_path}", file=sys.stderr)
-        return 1
-    
-    cmd = [sys.executable, str(script_path)] + args
-    try:
-        result = subprocess.run(cmd, cwd=get_script_path())
-        return result.returncode
-    except KeyboardInterrupt:
-        print("\nOperation cancelled by user", file=sys.stderr)
-        return 130
-    except Exception as e:
-        print(f"Error running btcrecover: {e}", file=sys.stderr)
-        return 1
+    from pathlib import Path
+    return Path(_SCRIPT_ROOT)
 
-def run_seedrecover(args):
-    """Run the seedrecover.py script with provided arguments"""
-    script_path = get_script_path() / "seedrecover.py"
-    if not script_path.exists():
-        print(f"Error: seedrecover.py not found at {script_path}", file=sys.stderr)
-        return 1
-    
-    cmd = [sys.executable, str(script_path)] + args
-    try:
-        result = subprocess.run(cmd, cwd=get_script_path())
-        return result.returncode
-    except KeyboardInterrupt:
-        print("\nOperation cancelled by user", file=sys.stderr)
-        return 130
-    except Exception as e:
-        print(f"Error running seedrecover: {e}", file=sys.stderr)
-        return 1
+def _exit_code(code):
+    """Map a SystemExit code to a process return code, as the interpreter would"""
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code
+    print(code, file=sys.stderr)
+    return 1
 
-def run_seedrecover_batch(args):
-    """Run the seedrecover_batch.py script with provided arguments"""
-    script_path = get_script_path() / "seedrecover_batch.py"
-    if not script_path.exists():
-        print(f"Error: seedrecover_batch.py not found at {script_path}", file=sys.stderr)
-        return 1
-    
-    cmd = [sys.executable, str(script_path)] + args
-    try:
-        result = subprocess.run(cmd, cwd=get_script_path())
-        return result.returncode
-    except KeyboardInterrupt:
-        print("\nOperation cancelled by user", file=sys.stderr)
-        return 130
-    except Exception as e:
-        print(f"Error running seedrecover_batch: {e}", file=sys.stderr)
-        return 1
+def _run_script_inprocess(script_path, argv):
+    """Run a script in this interpreter as __main__, returning its exit code
 
-def run_create_address_db(args):
-    """Run the create-address-db.py script with provided arguments"""
-    script_path = get_script_path() / "create-address-db.py"
-    if not script_path.exists():
-        print(f"Error: create-address-db.py not found at {script_path}", file=sys.stderr)
-        return 1
+    The script sees the same argv, sys.path[0] and working directory it would
+    get when launched as a separate process from its own directory.
+    """
+    import runpy
     
-    cmd = [sys.executable, str(script_path)] + args
+    script_dir = os.path.dirname(script_path)
+    old_argv, old_path, old_cwd = sys.argv, sys.path[:], os.getcwd()
     try:
-        result = subprocess.run(cmd, cwd=get_script_path())
-        return result.returncode
-    except KeyboardInterrupt:
-        print("\nOperation cancelled by user", file=sys.stderr)
-        return 130
-    except Exception as e:
-        print(f"Error running create-address-db: {e}", file=sys.stderr)
-        return 1
+        sys.argv = [script_path] + list(argv)
+        sys.path.insert(0, script_dir)
+        os.chdir(script_dir)
+        runpy.run_path(script_path, run_name="__main__")
+    except SystemExit as e:
+        return _exit_code(e.code)
+    finally:
+        sys.argv = old_argv
+        sys.path[:] = old_path
+        os.chdir(old_cwd)
+    return 0
 
-def run_check_address_db(args):
-    """Run the check-address-db.py script with provided arguments"""
-    script_path = get_script_path() / "check-address-db.py"
-    if not script_path.exists():
-        print(f"Error: check-address-db.py not found at {script_path}", file=sys.stderr)
-        return 1
-    
-    cmd = [sys.executable, str(script_path)] + args
+def _run(script_name, args):
+    """Run one of the original btcrecover scripts with provided arguments"""
+    script_path = _SCRIPTS[script_name]
     try:
-        result = subprocess.run(cmd, cwd=get_script_path())
-        return result.returncode
+        return _run_script_inprocess(script_path, args)
+    except FileNotFoundError as e:
+        # Tell a missing script apart from a missing file the script itself tried to open
+        if e.filename in (script_path, os.path.dirname(script_path)):
+            print(f"Error: {os.path.basename(script_path)} not found at {script_path}", file=sys.stderr)
+        else:
+            print(f"Error running {script_name}: {e}", file=sys.stderr)
+        return 1
     except KeyboardInterrupt:
         print("\nOperation cancelled by user", file=sys.stderr)
         return 130
     except Exception as e:
-        print(f"Error running check-address-db: {e}", file=sys.stderr)
+        print(f"Error running {script_name}: {e}", file=sys.stderr)
         return 1
 
+# Public wrappers for each script, kept for callers that used the old run_* functions
+run_btcrecover = functools.partial(_run, "btcrecover")
+run_seedrecover = functools.partial(_run, "seedrecover")
+run_seedrecover_batch = functools.partial(_run, "seedrecover_batch")
+run_create_address_db = functools.partial(_run, "create-address-db")
+run_check_address_db = functools.partial(_run, "check-address-db")
+
 def run_bitcoin2john(args):
     """Run the bitcoin2john functionality with provided arguments"""
     try:
@@ -127,6 +101,21 @@ def run_bitcoin2john(args):
         print(f"Error running bitcoin2john: {e}", file=sys.stderr)
         return 1
 
+# pywallet flag -> (option name, takes a value)
+_PYWALLET_FLAGS = {
+    '-p': ('passphrase', True),
+    '--passphrase': ('passphrase', True),
+    '-o': ('output_file', True),
+    '--output': ('output_file', True),
+    '-f': ('format_type', True),
+    '--format': ('format_type', True),
+    '-b': ('include_balance', False),
+    '--include-balance': ('include_balance', False),
+    '-v': ('verbose', False),
+    '--verbose': ('verbose', False),
+}
+_PYWALLET_FORMATS = frozenset(('json', 'csv', 'txt'))
+
 def run_pywallet(args):
     """Run the comprehensive pywallet functionality with provided arguments"""
     try:
@@ -138,36 +127,37 @@ def run_pywallet(args):
         
         # Parse arguments
         wallet_path = args[0]
-        passphrase = None
-        output_file = None
-        format_type = 'json'
-        include_balance = False
-        verbose = False
+        opts = {
+            'passphrase': None,
+            'output_file': None,
+            'format_type': 'json',
+            'include_balance': False,
+            'verbose': False,
+        }
         
         i = 1
         while i < len(args):
             arg = args[i]
-            if arg in ['-p', '--passphrase'] and i + 1 < len(args):
-                passphrase = args[i + 1]
-                i += 2
-            elif arg in ['-o', '--output'] and i + 1 < len(args):
-                output_file = args[i + 1]
-                i += 2
-            elif arg in ['-f', '--format'] and i + 1 < len(args):
-                format_type = args[i + 1]
-                if format_type not in ['json', 'csv', 'txt']:
-                    print(f"Error: Invalid format '{format_type}'. Use: json, csv, txt", file=sys.stderr)
+            spec = _PYWALLET_FLAGS.get(arg)
+            if spec is None or (spec[1] and i + 1 >= len(args)):
+                print(f"Error: Unknown argument '{arg}'", file=sys.stderr)
+                return 1
+            name, takes_value = spec
+            if takes_value:
+                opts[name] = args[i + 1]
+                if name == 'format_type' and opts[name] not in _PYWALLET_FORMATS:
+                    print(f"Error: Invalid format '{opts[name]}'. Use: json, csv, txt", file=sys.stderr)
                     return 1
                 i += 2
-            elif arg in ['-b', '--include-balance']:
-                include_balance = True
-                i += 1
-            elif arg in ['-v', '--verbose']:
-                verbose = True
-                i += 1
             else:
-                print(f"Error: Unknown argument '{arg}'", file=sys.stderr)
-                return 1
+                opts[name] = True
+                i += 1
+        
+        passphrase = opts['passphrase']
+        output_file = opts['output_file']
+        format_type = opts['format_type']
+        include_balance = opts['include_balance']
+        verbose = opts['verbose']
         
         # Initialize comprehensive wallet manager
         wallet_mgr = ComprehensiveWalletManager('bitcoin', verbose=verbose)
@@ -178,9 +168,7 @@ def run_pywallet(args):
         # Export data if output file specified
         if output_file:
             if format_type == 'json':
-                import json
-                with open(output_file, 'w') as f:
-                    json.dump(wallet_data, f, indent=2)
+                _export_json_data(wallet_data, output_file)
             elif format_type == 'csv':
                 _export_csv_data(wallet_data, output_file)
             elif format_type == 'txt':
@@ -209,6 +197,28 @@ def run_pywallet(args):
         print(f"Error running pywallet: {e}", file=sys.stderr)
         return 1
 
+def _export_json_data(wallet_data, output_file):
+    """Export wallet data as JSON, through orjson when it is installed"""
+    try:
+        import orjson
+    except ImportError:
+        orjson = None
+    
+    if orjson is not None:
+        try:
+            data = orjson.dumps(wallet_data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            # (e.g. integers wider than 64 bits, which only the stdlib encoder handles)
+            data = None
+        if data is not None:
+            with open(output_file, 'wb') as f:
+                f.write(data)
+            return
+    
+    import json
+    with open(output_file, 'w') as f:
+        json.dump(wallet_data, f, indent=2)
+
 def _export_csv_data(wallet_data, output_file):
     """Export wallet data as CSV"""
     import csv
@@ -220,124 +230,116 @@ def _export_csv_data(wallet_data, output_file):
             'Private Key', 'WIF', 'Encrypted', 'Balance (BTC)'
         ])
         
-        for key in wallet_data.get('keys', []):
-            balance = ''
-            if 'balance_info' in key and not key['balance_info'].get('error'):
-                balance = str(key['balance_info'].get('balance_btc', 0))
-            
-            writer.writerow([
+        # One writerows call over a generator lets the csv module drive the loop
+        writer.writerows(
+            (
                 key.get('address_uncompressed', ''),
                 key.get('address_compressed', ''),
                 key.get('private_key', ''),
                 key.get('wif', ''),
                 key.get('encrypted', False),
-                balance
-            ])
+                _csv_balance(key)
+            )
+            for key in wallet_data.get('keys', [])
+        )
+
+def _csv_balance(key):
+    """Balance column for a key in the CSV export ('' when unknown)"""
+    if 'balance_info' in key and not key['balance_info'].get('error'):
+        return str(key['balance_info'].get('balance_btc', 0))
+    return ''
 
 def _export_txt_data(wallet_data, output_file):
     """Export wallet data as readable text"""
-    with open(output_file, 'w', encoding='utf-8') as f:
-        f.write("Comprehensive Bitcoin Wallet Dump\n")
-        f.write("=" * 50 + "\n\n")
-        
-        # Metadata
-        metadata = wallet_data.get('metadata', {})
-        f.write("Wallet Information:\n")
-        f.write(f"  File: {metadata.get('wallet_file', 'N/A')}\n")
-        f.write(f"  Network: {metadata.get('network', 'bitcoin')}\n")
-        f.write(f"  Version: {metadata.get('version', 'N/A')}\n")
-        f.write(f"  Encrypted: {metadata.get('encrypted', False)}\n")
-        f.write("\n")
-        
-        # Statistics
-        stats = wallet_data.get('statistics', {})
-        f.write("Statistics:\n")
-        for key, value in stats.items():
-            f.write(f"  {key.replace('_', ' ').title()}: {value}\n")
-        f.write("\n")
+    # Collect the lines and write them in one go instead of one write() per line
+    parts = []
+    parts.append("Comprehensive Bitcoin Wallet Dump\n")
+    parts.append("=" * 50 + "\n\n")
+    
+    # Metadata
+    metadata = wallet_data.get('metadata', {})
+    parts.append("Wallet Information:\n")
+    parts.append(f"  File: {metadata.get('wallet_file', 'N/A')}\n")
+    parts.append(f"  Network: {metadata.get('network', 'bitcoin')}\n")
+    parts.append(f"  Version: {metadata.get('version', 'N/A')}\n")
+    parts.append(f"  Encrypted: {metadata.get('encrypted', False)}\n")
+    parts.append("\n")
+    
+    # Statistics
+    stats = wallet_data.get('statistics', {})
+    parts.append("Statistics:\n")
+    for key, value in stats.items():
+        parts.append(f"  {key.replace('_', ' ').title()}: {value}\n")
+    parts.append("\n")
+    
+    # Keys (every key has the same few fields, so their titles are formatted once)
+    titles = {}
+    parts.append("Private Keys and Addresses:\n")
+    parts.append("-" * 40 + "\n")
+    for i, key in enumerate(wallet_data.get('keys', []), 1):
+        parts.append(f"\nKey #{i}:\n")
+        for k, v in key.items():
+            if k != 'balance_info':
+                title = titles.get(k)
+                if title is None:
+                    title = titles[k] = k.replace('_', ' ').title()
+                parts.append(f"  {title}: {v}\n")
         
-        # Keys
-        f.write("Private Keys and Addresses:\n")
-        f.write("-" * 40 + "\n")
-        for i, key in enumerate(wallet_data.get('keys', []), 1):
-            f.write(f"\nKey #{i}:\n")
-            for k, v in key.items():
-                if k != 'balance_info':
-                    f.write(f"  {k.replace('_', ' ').title()}: {v}\n")
-            
-            if 'balance_info' in key and not key['balance_info'].get('error'):
-                balance = key['balance_info'].get('balance_btc', 0)
-                f.write(f"  Balance: {balance:.8f} BTC\n")
+        if 'balance_info' in key and not key['balance_info'].get('error'):
+            balance = key['balance_info'].get('balance_btc', 0)
+            parts.append(f"  Balance: {balance:.8f} BTC\n")
+    
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.writelines(parts)
 
-def show_version():
-    """Show version information"""
-    from . import __version__
-    print(f"BTCRecover CLI v{__version__}")
+# --help text for the subcommands implemented in this package
+_SUBCOMMAND_HELP = {
+    "bitcoin2john": """\
+bitcoin2john - Convert Bitcoin wallet to John the Ripper hash format
 
-def main():
-    """Main CLI entry point"""
-    # Check if we should show help for subcommands
-    if len(sys.argv) >= 3 and sys.argv[2] == "--help":
-        command = sys.argv[1]
-        if command == "password":
-            return run_btcrecover(["--help"])
-        elif command == "seed":
-            return run_seedrecover(["--help"])
-        elif command == "batch":
-            return run_seedrecover_batch(["--help"])
-        elif command == "create-db":
-            return run_create_address_db(["--help"])
-        elif command == "check-db":
-            return run_check_address_db(["--help"])
-        elif command == "bitcoin2john":
-            print("bitcoin2john - Convert Bitcoin wallet to John the Ripper hash format")
-            print()
-            print("Usage:")
-            print("  btcrecover bitcoin2john <wallet.dat> [-o output_file]")
-            print()
-            print("Arguments:")
-            print("  wallet.dat     Path to Bitcoin wallet.dat file")
-            print()
-            print("Options:")
-            print("  -o, --output   Output file (default: print to stdout)")
-            print()
-            print("This tool extracts encryption information from Bitcoin wallet.dat files")
-            print("and converts it to a format suitable for password cracking with John the Ripper.")
-            return 0
-        elif command == "pywallet":
-            print("pywallet - Comprehensive Bitcoin wallet management and recovery tool")
-            print()
-            print("Usage:")
-            print("  btcrecover pywallet <wallet.dat> [options]")
-            print()
-            print("Arguments:")
-            print("  wallet.dat     Path to Bitcoin wallet.dat file")
-            print()
-            print("Options:")
-            print("  -p, --passphrase PASS    Passphrase for encrypted wallets")
-            print("  -o, --output FILE        Output file path")
-            print("  -f, --format FORMAT      Export format: json, csv, txt (default: json)")
-            print("  -b, --include-balance    Include balance information")
-            print("  -v, --verbose           Enable verbose output")
-            print()
-            print("This comprehensive tool provides:")
-            print("• Advanced wallet analysis and key extraction")
-            print("• Support for compressed and uncompressed keys")
-            print("• WIF (Wallet Import Format) generation")
-            print("• Multiple address format support")
-            print("• Balance checking with API integration")
-            print("• Comprehensive statistics and metadata")
-            print("• Advanced encryption handling")
-            print("• Export in multiple formats")
-            print("\nFor advanced features (disk recovery, web interface, etc.):")
-            print("  python3 -m btcrecover_cli.pywallet_full --help")
-            return 0
-    
-    parser = argparse.ArgumentParser(
-        prog="btcrecover",
-        description="Bitcoin wallet password and seed recovery tool",
-        formatter_class=argparse.RawDescriptionHelpFormatter,
-        epilog="""
+Usage:
+  btcrecover bitcoin2john <wallet.dat> [-o output_file]
+
+Arguments:
+  wallet.dat     Path to Bitcoin wallet.dat file
+
+Options:
+  -o, --output   Output file (default: print to stdout)
+
+This tool extracts encryption information from Bitcoin wallet.dat files
+and converts it to a format suitable for password cracking with John the Ripper.""",
+    "pywallet": """\
+pywallet - Comprehensive Bitcoin wallet management and recovery tool
+
+Usage:
+  btcrecover pywallet <wallet.dat> [options]
+
+Arguments:
+  wallet.dat     Path to Bitcoin wallet.dat file
+
+Options:
+  -p, --passphrase PASS    Passphrase for encrypted wallets
+  -o, --output FILE        Output file path
+  -f, --format FORMAT      Export format: json, csv, txt (default: json)
+  -b, --include-balance    Include balance information
+  -v, --verbose           Enable verbose output
+
+This comprehensive tool provides:
+• Advanced wallet analysis and key extraction
+• Support for compressed and uncompressed keys
+• WIF (Wallet Import Format) generation
+• Multiple address format support
+• Balance checking with API integration
+• Comprehensive statistics and metadata
+• Advanced encryption handling
+• Export in multiple formats
+
+For advanced features (disk recovery, web interface, etc.):
+  python3 -m btcrecover_cli.pywallet_full --help""",
+}
+
+# Top-level help epilog; only handed to argparse when the parser is actually built
+_EPILOG = """
 BTCRecover CLI provides both direct script access and convenience commands:
 
 Direct Script Access (matches documentation):
@@ -368,6 +370,22 @@ For detailed help on each command, use:
 
 Documentation: https://btcrecover.readthedocs.io/
         """
+
+def show_version():
+    """Show version information"""
+    from . import __version__
+    print(f"BTCRecover CLI v{__version__}")
+
+@functools.lru_cache(maxsize=1)
+def _build_parser():
+    """Build the CLI argument parser once, returning (parser, subparsers)"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(
+        prog="btcrecover",
+        description="Bitcoin wallet password and seed recovery tool",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=_EPILOG
     )
     
     parser.add_argument(
@@ -383,91 +401,105 @@ Documentation: https://btcrecover.readthedocs.io/
     )
     
     # Password recovery subcommand
-    password_parser = subparsers.add_parser(
+    subparsers.add_parser(
         "password",
         help="Recover wallet passwords",
-        description="Recover passwords for various cryptocurrency wallets"
-    )
-    password_parser.add_argument(
-        "args",
-        nargs=argparse.REMAINDER,
-        help="Arguments to pass to btcrecover.py"
+        description="Recover passwords for various cryptocurrency wallets",
+        epilog="Any further arguments are passed to btcrecover.py"
     )
     
     # Seed recovery subcommand
-    seed_parser = subparsers.add_parser(
+    subparsers.add_parser(
         "seed",
         help="Recover mnemonic seeds",
-        description="Recover mnemonic seed phrases for BIP39/BIP44 wallets"
-    )
-    seed_parser.add_argument(
-        "args",
-        nargs=argparse.REMAINDER,
-        help="Arguments to pass to seedrecover.py"
+        description="Recover mnemonic seed phrases for BIP39/BIP44 wallets",
+        epilog="Any further arguments are passed to seedrecover.py"
     )
     
     # Batch seed recovery subcommand
-    batch_parser = subparsers.add_parser(
+    subparsers.add_parser(
         "batch",
         help="Batch seed recovery",
-        description="Run multiple seed recovery operations in batch"
-    )
-    batch_parser.add_argument(
-        "args",
-        nargs=argparse.REMAINDER,
-        help="Arguments to pass to seedrecover_batch.py"
+        description="Run multiple seed recovery operations in batch",
+        epilog="Any further arguments are passed to seedrecover_batch.py"
     )
     
     # Create address database subcommand
-    create_db_parser = subparsers.add_parser(
+    subparsers.add_parser(
         "create-db",
         help="Create address database",
-        description="Create an address database for wallet recovery"
-    )
-    create_db_parser.add_argument(
-        "args",
-        nargs=argparse.REMAINDER,
-        help="Arguments to pass to create-address-db.py"
+        description="Create an address database for wallet recovery",
+        epilog="Any further arguments are passed to create-address-db.py"
     )
     
     # Check address database subcommand
-    check_db_parser = subparsers.add_parser(
+    subparsers.add_parser(
         "check-db",
         help="Check address database",
-        description="Check and verify an address database"
-    )
-    check_db_parser.add_argument(
-        "args",
-        nargs=argparse.REMAINDER,
-        help="Arguments to pass to check-address-db.py"
+        description="Check and verify an address database",
+        epilog="Any further arguments are passed to check-address-db.py"
     )
     
     # Bitcoin2john subcommand
-    bitcoin2john_parser = subparsers.add_parser(
+    subparsers.add_parser(
         "bitcoin2john",
         help="Convert wallet to John hash format",
-        description="Convert Bitcoin wallet.dat to John the Ripper hash format"
-    )
-    bitcoin2john_parser.add_argument(
-        "args",
-        nargs=argparse.REMAINDER,
-        help="Arguments: <wallet.dat> [-o output_file]"
+        description="Convert Bitcoin wallet.dat to John the Ripper hash format",
+        epilog="Arguments: <wallet.dat> [-o output_file]"
     )
     
     # PyWallet subcommand
-    pywallet_parser = subparsers.add_parser(
+    subparsers.add_parser(
         "pywallet",
         help="Wallet analysis and key extraction",
-        description="Comprehensive Bitcoin wallet analysis and key extraction"
-    )
-    pywallet_parser.add_argument(
-        "args",
-        nargs=argparse.REMAINDER,
-        help="Arguments: <wallet.dat> [-p passphrase] [-o output] [-f format]"
+        description="Comprehensive Bitcoin wallet analysis and key extraction",
+        epilog="Arguments: <wallet.dat> [-p passphrase] [-o output] [-f format]"
     )
     
-    # Parse arguments
-    args = parser.parse_args()
+    return parser, subparsers
+
+# Subcommand -> handler taking the forwarded argument list
+_ROUTES = {
+    "password": run_btcrecover,
+    "seed": run_seedrecover,
+    "batch": run_seedrecover_batch,
+    "create-db": run_create_address_db,
+    "check-db": run_check_address_db,
+    "bitcoin2john": run_bitcoin2john,
+    "pywallet": run_pywallet,
+}
+
+def main():
+    """Main CLI entry point"""
+    # A bare version query doesn't need argparse at all
+    if sys.argv[1:] in (["-v"], ["--version"]):
+        show_version()
+        return 0
+    
+    # Check if we should show help for subcommands
+    if len(sys.argv) >= 3 and sys.argv[2] == "--help":
+        command = sys.argv[1]
+        help_text = _SUBCOMMAND_HELP.get(command)
+        if help_text is not None:
+            sys.stdout.write(help_text + "\n")
+            return 0
+        if command in _ROUTES:
+            return _ROUTES[command](["--help"])
+    
+    # Subcommands forward their arguments untouched, so skip argparse unless
+    # something after the command could be a help flag (or a "--" separator)
+    handler = _ROUTES.get(sys.argv[1]) if len(sys.argv) >= 2 else None
+    if handler is not None:
+        rest = sys.argv[2:]
+        if not any(arg == "--" or arg.startswith("-h") or arg.startswith("--h") for arg in rest):
+            return handler(rest)
+    
+    parser, _ = _build_parser()
+    
+    # Parse arguments (everything after the subcommand is passed through untouched)
+    args, extra_args = parser.parse_known_args()
+    if extra_args and not args.command:
+        parser.error(f"unrecognized arguments: {' '.join(extra_args)}")
     
     # Handle version
     if args.version:
@@ -480,23 +512,11 @@ Documentation: https://btcrecover.readthedocs.io/
         return 1
     
     # Route to appropriate handler
-    if args.command == "password":
-        return run_btcrecover(args.args)
-    elif args.command == "seed":
-        return run_seedrecover(args.args)
-    elif args.command == "batch":
-        return run_seedrecover_batch(args.args)
-    elif args.command == "create-db":
-        return run_create_address_db(args.args)
-    elif args.command == "check-db":
-        return run_check_address_db(args.args)
-    elif args.command == "bitcoin2john":
-        return run_bitcoin2john(args.args)
-    elif args.command == "pywallet":
-        return run_pywallet(args.args)
-    else:
+    handler = _ROUTES.get(args.command)
+    if handler is None:
         parser.print_help()
         return 1
+    return handler(extra_args)
 
 if __name__ == "__main__":
     sys.exit(main())
\ No newline at end of file
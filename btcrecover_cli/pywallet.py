@@ -12,27 +12,43 @@ and integrated into the btcrecover ecosystem.
 
 import sys
 import os
-import json
 import logging
-import binascii
 import hashlib
-import struct
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from operator import itemgetter
 from typing import Dict, List, Optional, Tuple, Any
-from pathlib import Path
 
+# AES comes from pycryptodome, which uses AES-NI where the CPU has it
 try:
-    from bsddb3.db import *
+    from Crypto.Cipher import AES
+    from Crypto.Util.Padding import unpad
+    HAS_PYCRYPTO = True
 except ImportError:
-    try:
-        from bsddb.db import *
-    except ImportError:
-        print("Error: bsddb3 or bsddb package is required", file=sys.stderr)
-        sys.exit(1)
+    HAS_PYCRYPTO = False
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Import from our existing bitcoin2john module for compatibility
 from .bitcoin2john import (
-    BCDataStream, SerializationError, open_wallet, parse_wallet,
-    hash_160, public_key_to_bc_address, b58encode, Hash
+    open_wallet, parse_wallet, _mmap_parse_wallet, derive_address_map, Hash
+)
+
+
+# Wallets with more encrypted keys than this decrypt them in chunks of this size on a process pool
+CKEY_CHUNK_SIZE = 8192
+
+
+# One key's block in the text export, filled straight from the key entry dict
+_TXT_KEY_TEMPLATE = (
+    "Address: %(address)s\n"
+    "Private Key: %(private_key)s\n"
+    "Compressed: %(compressed)s\n"
+    "Encrypted: %(encrypted)s\n"
+    "\n"
 )
 
 
@@ -41,12 +57,97 @@ class PyWalletError(Exception):
     pass
 
 
+def _decrypt_master_key(mkey: Dict[str, Any], passphrase: str) -> Optional[bytes]:
+    """Decrypt a wallet master key record, returning None if the passphrase is wrong"""
+    if not HAS_PYCRYPTO:
+        raise PyWalletError("pycryptodome is required for decryption")
+    if mkey['nDerivationMethod'] != 0:
+        raise PyWalletError(f"Unsupported key derivation method: {mkey['nDerivationMethod']}")
+    
+    # Bitcoin Core's EVP_BytesToKey: SHA512 iterated nDerivationIterations times
+    digest = hashlib.sha512(passphrase.encode('utf-8') + mkey['salt']).digest()
+    for _ in range(mkey['nDerivationIterations'] - 1):
+        digest = hashlib.sha512(digest).digest()
+    
+    cipher = AES.new(digest[:32], AES.MODE_CBC, digest[32:48])
+    try:
+        master_key = unpad(cipher.decrypt(mkey['encrypted_key']), AES.block_size)
+    except ValueError:
+        return None
+    return master_key if len(master_key) == 32 else None
+
+
+def _decrypt_ckeys(master_key: bytes, ckeys: List[Tuple[bytes, bytes]]) -> List[Optional[bytes]]:
+    """Decrypt (encrypted_key, public_key) pairs with a single AES key schedule"""
+    if any(not ct or len(ct) % AES.block_size for ct, _ in ckeys):
+        return [_decrypt_ckey(master_key, ct, pk) for ct, pk in ckeys]
+    
+    # CBC decryption is ECB decryption XORed with the previous ciphertext block (the IV
+    # for the first), so one ECB pass over every key replaces a CBC cipher per key
+    plaintext = AES.new(master_key, AES.MODE_ECB).decrypt(b''.join(ct for ct, _ in ckeys))
+    private_keys = []
+    offset = 0
+    for ct, pk in ckeys:
+        size = len(ct)
+        chain = Hash(pk)[:16] + ct[:-AES.block_size]
+        block = (int.from_bytes(plaintext[offset:offset + size], 'big') ^
+                 int.from_bytes(chain, 'big')).to_bytes(size, 'big')
+        offset += size
+        try:
+            private_key = unpad(block, AES.block_size)
+        except ValueError:
+            private_keys.append(None)
+            continue
+        private_keys.append(private_key if len(private_key) == 32 else None)
+    return private_keys
+
+
+def _decrypt_ckeys_parallel(master_key: bytes, ckeys: List[Tuple[bytes, bytes]]) -> List[Optional[bytes]]:
+    """Decrypt (encrypted_key, public_key) pairs, spreading large wallets across processes"""
+    workers = os.cpu_count() or 1
+    if len(ckeys) <= CKEY_CHUNK_SIZE or workers < 2:
+        return _decrypt_ckeys(master_key, ckeys)
+    
+    # The per-key CBC unchaining is interpreter-bound, so threads wouldn't help here;
+    # each worker sets up its own AES key schedule once for its chunk
+    chunks = [ckeys[i:i + CKEY_CHUNK_SIZE] for i in range(0, len(ckeys), CKEY_CHUNK_SIZE)]
+    with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as executor:
+        return [key for chunk in executor.map(_decrypt_ckeys, repeat(master_key), chunks) for key in chunk]
+
+
+def _decrypt_ckey(master_key: bytes, encrypted_key: bytes, public_key: bytes) -> Optional[bytes]:
+    """Decrypt one encrypted private key with the unlocked master key"""
+    # Each key's IV is the first 16 bytes of the double-SHA256 of its public key
+    cipher = AES.new(master_key, AES.MODE_CBC, Hash(public_key)[:16])
+    try:
+        private_key = unpad(cipher.decrypt(encrypted_key), AES.block_size)
+    except ValueError:
+        return None
+    return private_key if len(private_key) == 32 else None
+
+
 class WalletDumper:
     """Main class for wallet dumping and key extraction operations"""
     
     def __init__(self, verbose: bool = False):
         self.verbose = verbose
         self.logger = logging.getLogger(__name__)
+        # Master key records and their unlocked keys for the wallet being dumped, by mkey id
+        self._mkeys = {}
+        self._master_keys = {}
+        # (key entry, encrypted private key, public key) for ckeys awaiting decryption
+        self._pending_ckeys = []
+        # (key entry, public key) for keys whose address is still to be derived
+        self._pending_addrs = []
+        # Record type -> handler, looked up once per record
+        self._handlers = {
+            'key': self._h_key,
+            'ckey': self._h_ckey,
+            'mkey': self._h_mkey,
+            'tx': self._h_tx,
+            'version': self._h_version,
+            'setting': self._h_setting,
+        }
         if verbose:
             logging.basicConfig(level=logging.DEBUG)
     
@@ -80,15 +181,26 @@ class WalletDumper:
             }
         }
         
+        self._mkeys = {}
+        self._master_keys = {}
+        self._pending_ckeys = []
+        self._pending_addrs = []
+        
         try:
-            # Use our existing wallet parsing functionality
-            db = open_wallet(wallet_path)
-            
             def item_callback(record_type: str, d: Dict[str, Any]):
                 self._process_wallet_record(record_type, d, wallet_data, passphrase)
             
-            parse_wallet(db, item_callback)
-            db.close()
+            # Walk the BDB pages directly when possible, falling back to bsddb's cursor
+            if not _mmap_parse_wallet(wallet_path, item_callback):
+                db = open_wallet(wallet_path)
+                parse_wallet(db, item_callback)
+                db.close()
+            
+            self._fill_addresses()
+            
+            # ckey records sort before the mkey record, so decrypt once parsing is done
+            if passphrase:
+                self._decrypt_encrypted_keys(wallet_data, passphrase)
             
             # Post-process the wallet data
             self._post_process_wallet_data(wallet_data, include_balance)
@@ -105,126 +217,148 @@ class WalletDumper:
     def _process_wallet_record(self, record_type: str, d: Dict[str, Any], 
                               wallet_data: Dict[str, Any], passphrase: Optional[str]):
         """Process individual wallet records"""
-        
-        if record_type == "key":
-            # Unencrypted private key
-            try:
-                addr = public_key_to_bc_address(d['public_key'])
-                private_key_hex = binascii.hexlify(d['private_key']).decode()
-                compressed = len(d['public_key']) == 33
-                
-                wallet_data['keys'].append({
-                    'address': addr,
-                    'private_key': private_key_hex,
-                    'public_key': binascii.hexlify(d['public_key']).decode(),
-                    'compressed': compressed,
-                    'encrypted': False
-                })
-                
-                wallet_data['addresses'].append({
-                    'address': addr,
-                    'type': 'key',
-                    'compressed': compressed
-                })
-                
-            except Exception as e:
-                self.logger.warning(f"Failed to process key: {e}")
-        
-        elif record_type == "ckey":
-            # Encrypted private key
-            wallet_data['metadata']['encrypted'] = True
+        handler = self._handlers.get(record_type)
+        if handler:
+            handler(d, wallet_data, passphrase)
+    
+    def _h_key(self, d: Dict[str, Any], wallet_data: Dict[str, Any], passphrase: Optional[str]):
+        """Unencrypted private key record"""
+        try:
+            private_key_hex = d['private_key'].hex()
+            compressed = len(d['public_key']) == 33
             
-            try:
-                addr = public_key_to_bc_address(d['public_key'])
-                compressed = len(d['public_key']) == 33
-                
-                key_entry = {
-                    'address': addr,
-                    'private_key': 'ENCRYPTED',
-                    'encrypted_private_key': binascii.hexlify(d['encrypted_private_key']).decode(),
-                    'public_key': binascii.hexlify(d['public_key']).decode(),
-                    'compressed': compressed,
-                    'encrypted': True
-                }
-                
-                # If passphrase provided, attempt decryption
-                if passphrase:
-                    try:
-                        decrypted_key = self._decrypt_private_key(
-                            d['encrypted_private_key'], passphrase, wallet_data
-                        )
-                        if decrypted_key:
-                            key_entry['private_key'] = binascii.hexlify(decrypted_key).decode()
-                            key_entry['decryption_status'] = 'success'
-                        else:
-                            key_entry['decryption_status'] = 'failed'
-                    except Exception as e:
-                        key_entry['decryption_status'] = f'error: {e}'
-                        self.logger.warning(f"Failed to decrypt key for {addr}: {e}")
-                
-                wallet_data['keys'].append(key_entry)
-                
-                wallet_data['addresses'].append({
-                    'address': addr,
-                    'type': 'ckey',
-                    'compressed': compressed,
-                    'encrypted': True
-                })
-                
-            except Exception as e:
-                self.logger.warning(f"Failed to process encrypted key: {e}")
-        
-        elif record_type == "mkey":
-            # Master key information
-            wallet_data['metadata']['master_key'] = {
-                'id': d.get('nID'),
-                'salt': binascii.hexlify(d['salt']).decode() if 'salt' in d else None,
-                'iterations': d.get('nDerivationIterations'),
-                'method': d.get('nDerivationMethod')
+            # (addresses are filled in by _fill_addresses once parsing is done)
+            key_entry = {
+                'address': None,
+                'private_key': private_key_hex,
+                'public_key': d['public_key'].hex(),
+                'compressed': compressed,
+                'encrypted': False
             }
+            wallet_data['keys'].append(key_entry)
+            self._pending_addrs.append((key_entry, d['public_key']))
+            
+        except Exception as e:
+            self.logger.warning(f"Failed to process key: {e}")
+    
+    def _h_ckey(self, d: Dict[str, Any], wallet_data: Dict[str, Any], passphrase: Optional[str]):
+        """Encrypted private key record"""
+        wallet_data['metadata']['encrypted'] = True
         
-        elif record_type == "tx":
-            # Transaction data
-            wallet_data['transactions'].append({
-                'txid': d.get('tx_id'),
-                'inputs': d.get('txIn', []),
-                'outputs': d.get('txOut', []),
-                'version': d.get('version'),
-                'lock_time': d.get('lockTime')
-            })
-        
-        elif record_type == "version":
-            wallet_data['metadata']['version'] = d.get('version')
+        try:
+            compressed = len(d['public_key']) == 33
+            
+            key_entry = {
+                'address': None,
+                'private_key': 'ENCRYPTED',
+                'encrypted_private_key': d['encrypted_private_key'].hex(),
+                'public_key': d['public_key'].hex(),
+                'compressed': compressed,
+                'encrypted': True
+            }
+            
+            wallet_data['keys'].append(key_entry)
+            if passphrase:
+                self._pending_ckeys.append(
+                    (key_entry, d['encrypted_private_key'], d['public_key'])
+                )
+            self._pending_addrs.append((key_entry, d['public_key']))
+            
+        except Exception as e:
+            self.logger.warning(f"Failed to process encrypted key: {e}")
+    
+    def _h_mkey(self, d: Dict[str, Any], wallet_data: Dict[str, Any], passphrase: Optional[str]):
+        """Master key information record"""
+        self._mkeys[d['nID']] = d
+        wallet_data['metadata']['master_key'] = {
+            'id': d.get('nID'),
+            'salt': d['salt'].hex() if 'salt' in d else None,
+            'iterations': d.get('nDerivationIterations'),
+            'method': d.get('nDerivationMethod')
+        }
+    
+    def _h_tx(self, d: Dict[str, Any], wallet_data: Dict[str, Any], passphrase: Optional[str]):
+        """Transaction data record"""
+        wallet_data['transactions'].append({
+            'txid': d.get('tx_id'),
+            'inputs': d.get('txIn', []),
+            'outputs': d.get('txOut', []),
+            'version': d.get('version'),
+            'lock_time': d.get('lockTime')
+        })
+    
+    def _h_version(self, d: Dict[str, Any], wallet_data: Dict[str, Any], passphrase: Optional[str]):
+        """Wallet version record"""
+        wallet_data['metadata']['version'] = d.get('version')
+    
+    def _h_setting(self, d: Dict[str, Any], wallet_data: Dict[str, Any], passphrase: Optional[str]):
+        """Wallet setting record"""
+        setting_name = d.get('setting')
+        if isinstance(setting_name, bytes):
+            setting_name = setting_name.decode('utf-8', errors='ignore')
+        wallet_data['settings'][setting_name] = d.get('value')
+    
+    def _fill_addresses(self):
+        """Derive the addresses of all parsed keys in one batch"""
+        pending, self._pending_addrs = self._pending_addrs, []
+        addr_by_pubkey = derive_address_map(public_key for _, public_key in pending)
+        for key_entry, public_key in pending:
+            key_entry['address'] = addr_by_pubkey[public_key]
+    
+    def _unlock_master_key(self, passphrase: str) -> Optional[bytes]:
+        """Decrypt the wallet's master key, deriving it only once per mkey id"""
+        if not self._mkeys:
+            raise PyWalletError("No master key found in wallet")
+        nID = next(iter(self._mkeys))
+        if nID not in self._master_keys:
+            self._master_keys[nID] = _decrypt_master_key(self._mkeys[nID], passphrase)
+        return self._master_keys[nID]
+    
+    def _decrypt_encrypted_keys(self, wallet_data: Dict[str, Any], passphrase: str):
+        """Decrypt every pending encrypted key entry in place, recording a decryption_status"""
+        pending, self._pending_ckeys = self._pending_ckeys, []
+        try:
+            master_key = self._unlock_master_key(passphrase)
+            if master_key is None:
+                decrypted_keys = [None] * len(pending)
+            else:
+                decrypted_keys = _decrypt_ckeys_parallel(master_key, [(ct, pk) for _, ct, pk in pending])
+        except Exception as e:
+            self.logger.warning(f"Cannot decrypt keys: {e}")
+            for key_entry, _, _ in pending:
+                key_entry['decryption_status'] = f'error: {e}'
+            return
         
-        elif record_type == "setting":
-            setting_name = d.get('setting')
-            if isinstance(setting_name, bytes):
-                setting_name = setting_name.decode('utf-8', errors='ignore')
-            wallet_data['settings'][setting_name] = d.get('value')
-    
-    def _decrypt_private_key(self, encrypted_key: bytes, passphrase: str, 
-                           wallet_data: Dict[str, Any]) -> Optional[bytes]:
-        """Attempt to decrypt an encrypted private key"""
-        # This is a placeholder - would need full implementation
-        # for actual decryption based on wallet encryption parameters
-        self.logger.debug("Private key decryption not fully implemented")
-        return None
+        for (key_entry, _, _), decrypted_key in zip(pending, decrypted_keys):
+            if decrypted_key:
+                key_entry['private_key'] = decrypted_key.hex()
+                key_entry['decryption_status'] = 'success'
+            else:
+                key_entry['decryption_status'] = 'failed'
     
     def _post_process_wallet_data(self, wallet_data: Dict[str, Any], include_balance: bool):
         """Post-process wallet data after extraction"""
-        # Sort addresses and keys
-        wallet_data['addresses'].sort(key=lambda x: x['address'])
-        wallet_data['keys'].sort(key=lambda x: x['address'])
+        # Sort the keys, then derive the address list from them in one pass (so it comes out
+        # sorted too) rather than building a parallel entry for every key while parsing
+        wallet_data['keys'].sort(key=itemgetter('address'))
+        wallet_data['addresses'] = [
+            {'address': key['address'], 'type': 'ckey', 'compressed': key['compressed'], 'encrypted': True}
+            if key['encrypted'] else
+            {'address': key['address'], 'type': 'key', 'compressed': key['compressed']}
+            for key in wallet_data['keys']
+        ]
         
         # Add balance information if requested
         if include_balance:
             self._add_balance_info(wallet_data)
         
         # Add statistics
+        total_keys = len(wallet_data['keys'])
+        encrypted_keys = sum(1 for k in wallet_data['keys'] if k['encrypted'])
         wallet_data['statistics'] = {
-            'total_keys': len(wallet_data['keys']),
-            'encrypted_keys': sum(1 for k in wallet_data['keys'] if k['encrypted']),
-            'unencrypted_keys': sum(1 for k in wallet_data['keys'] if not k['encrypted']),
+            'total_keys': total_keys,
+            'encrypted_keys': encrypted_keys,
+            'unencrypted_keys': total_keys - encrypted_keys,
             'total_addresses': len(wallet_data['addresses']),
             'total_transactions': len(wallet_data['transactions'])
         }
@@ -256,7 +390,19 @@ class WalletDumper:
             raise PyWalletError(f"Unsupported export format: {format_type}")
     
     def _export_json(self, wallet_data: Dict[str, Any], output_path: str):
-        """Export wallet data as JSON"""
+        """Export wallet data as JSON, through orjson when it is installed"""
+        if orjson is not None:
+            try:
+                data = orjson.dumps(wallet_data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+            except TypeError:
+                # (e.g. integers wider than 64 bits, which only the stdlib encoder handles)
+                data = None
+            if data is not None:
+                with open(output_path, 'wb') as f:
+                    f.write(data)
+                return
+        
+        import json
         with open(output_path, 'w', encoding='utf-8') as f:
             json.dump(wallet_data, f, indent=2, ensure_ascii=False)
     
@@ -264,50 +410,48 @@ class WalletDumper:
         """Export wallet keys as CSV"""
         import csv
         
-        with open(output_path, 'w', newline='', encoding='utf-8') as f:
+        with open(output_path, 'w', newline='', encoding='utf-8', buffering=1 << 20) as f:
             writer = csv.writer(f)
             writer.writerow(['Address', 'Private Key', 'Compressed', 'Encrypted'])
             
-            for key in wallet_data['keys']:
-                writer.writerow([
-                    key['address'],
-                    key['private_key'],
-                    key['compressed'],
-                    key['encrypted']
-                ])
+            # One writerows call over a generator lets the csv module drive the loop
+            writer.writerows(
+                (key['address'], key['private_key'], key['compressed'], key['encrypted'])
+                for key in wallet_data['keys']
+            )
     
     def _export_txt(self, wallet_data: Dict[str, Any], output_path: str):
         """Export wallet data as readable text"""
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write("Bitcoin Wallet Dump\n")
-            f.write("=" * 50 + "\n\n")
-            
-            # Metadata
-            f.write("Wallet Information:\n")
-            f.write(f"  File: {wallet_data['metadata']['wallet_file']}\n")
-            f.write(f"  Version: {wallet_data['metadata']['version']}\n")
-            f.write(f"  Encrypted: {wallet_data['metadata']['encrypted']}\n")
-            f.write("\n")
-            
-            # Statistics
-            stats = wallet_data['statistics']
-            f.write("Statistics:\n")
-            f.write(f"  Total Keys: {stats['total_keys']}\n")
-            f.write(f"  Encrypted Keys: {stats['encrypted_keys']}\n")
-            f.write(f"  Unencrypted Keys: {stats['unencrypted_keys']}\n")
-            f.write(f"  Total Addresses: {stats['total_addresses']}\n")
-            f.write(f"  Total Transactions: {stats['total_transactions']}\n")
-            f.write("\n")
-            
-            # Keys and addresses
-            f.write("Private Keys:\n")
-            f.write("-" * 30 + "\n")
-            for key in wallet_data['keys']:
-                f.write(f"Address: {key['address']}\n")
-                f.write(f"Private Key: {key['private_key']}\n")
-                f.write(f"Compressed: {key['compressed']}\n")
-                f.write(f"Encrypted: {key['encrypted']}\n")
-                f.write("\n")
+        # Collect the lines and write them in one go instead of one write() per line
+        parts = []
+        parts.append("Bitcoin Wallet Dump\n")
+        parts.append("=" * 50 + "\n\n")
+        
+        # Metadata
+        parts.append("Wallet Information:\n")
+        parts.append(f"  File: {wallet_data['metadata']['wallet_file']}\n")
+        parts.append(f"  Version: {wallet_data['metadata']['version']}\n")
+        parts.append(f"  Encrypted: {wallet_data['metadata']['encrypted']}\n")
+        parts.append("\n")
+        
+        # Statistics
+        stats = wallet_data['statistics']
+        parts.append("Statistics:\n")
+        parts.append(f"  Total Keys: {stats['total_keys']}\n")
+        parts.append(f"  Encrypted Keys: {stats['encrypted_keys']}\n")
+        parts.append(f"  Unencrypted Keys: {stats['unencrypted_keys']}\n")
+        parts.append(f"  Total Addresses: {stats['total_addresses']}\n")
+        parts.append(f"  Total Transactions: {stats['total_transactions']}\n")
+        parts.append("\n")
+        
+        # Keys and addresses
+        parts.append("Private Keys:\n")
+        parts.append("-" * 30 + "\n")
+        parts.extend(_TXT_KEY_TEMPLATE % key for key in wallet_data['keys'])
+        
+        # Encode once and hand the whole blob to a binary file, skipping the text layer
+        with open(output_path, 'wb') as f:
+            f.write(''.join(parts).encode('utf-8'))
 
 
 def pywallet_dump_wallet(wallet_path: str, passphrase: Optional[str] = None,
@@ -33,6 +33,8 @@ import argparse
 import base64
 import urllib.request
 import urllib.parse
+import urllib.error
+from concurrent.futures import ThreadPoolExecutor
 
 # Web interface imports
 try:
@@ -99,6 +101,13 @@ NETWORKS = {
 
 DEFAULT_NETWORK = 'bitcoin'
 
+# Concurrent balance lookups, kept within the free-tier rate limits of the
+# public APIs (BlockCypher allows 3 requests/second without a token)
+BALANCE_WORKERS = 3
+# Retries (with exponential backoff) when an API answers HTTP 429
+BALANCE_RETRIES = 3
+BALANCE_BACKOFF = 1.0
+
 class PyWalletError(Exception):
     """Custom exception for PyWallet operations"""
     pass
@@ -378,8 +387,7 @@ class BalanceChecker:
         for api_url in self.apis[self.network]:
             try:
                 url = api_url.format(address)
-                response = urllib.request.urlopen(url, timeout=10)
-                data = json.loads(response.read().decode())
+                data = json.loads(self._fetch(url).decode())
                 
                 # Parse response based on API
                 if 'blockstream.info' in api_url:
@@ -404,6 +412,20 @@ class BalanceChecker:
                 continue  # Try next API
         
         return {'balance': 'N/A - API unavailable', 'error': True}
+    
+    def _fetch(self, url: str) -> bytes:
+        """Fetch a URL, backing off and retrying while the API is rate limiting us"""
+        delay = BALANCE_BACKOFF
+        for attempt in range(BALANCE_RETRIES + 1):
+            try:
+                with urllib.request.urlopen(url, timeout=10) as response:
+                    return response.read()
+            except urllib.error.HTTPError as e:
+                if e.code != 429 or attempt == BALANCE_RETRIES:
+                    raise
+                retry_after = e.headers.get('Retry-After') if e.headers else None
+                time.sleep(float(retry_after) if retry_after and retry_after.isdigit() else delay)
+                delay *= 2
 
 class WebInterface:
     """Web interface for wallet management"""
@@ -635,11 +657,6 @@ class ComprehensiveWalletManager:
                     'wif_compressed': self._private_key_to_wif(d['private_key'], compressed=True)
                 }
                 
-                # Add balance information if requested
-                if include_balance:
-                    balance_info = self.balance_checker.check_balance(addr_uncompressed)
-                    key_entry['balance_info'] = balance_info
-                
                 wallet_data['keys'].append(key_entry)
                 
                 # Add to addresses list
@@ -701,11 +718,6 @@ class ComprehensiveWalletManager:
                     except Exception as e:
                         key_entry['decryption_status'] = f'error: {e}'
                 
-                # Add balance information if requested
-                if include_balance:
-                    balance_info = self.balance_checker.check_balance(addr_uncompressed)
-                    key_entry['balance_info'] = balance_info
-                
                 wallet_data['keys'].append(key_entry)
                 
             except Exception as e:
@@ -797,10 +809,21 @@ class ComprehensiveWalletManager:
         wif_bytes = key_with_version + checksum
         return b58encode(wif_bytes).decode()
     
+    def _add_balance_info(self, keys: List[Dict[str, Any]]):
+        """Look up every key's balance, overlapping the network round trips on a thread pool"""
+        addresses = [key['address_uncompressed'] for key in keys]
+        with ThreadPoolExecutor(max_workers=BALANCE_WORKERS) as executor:
+            for key, balance_info in zip(keys, executor.map(self.balance_checker.check_balance, addresses)):
+                key['balance_info'] = balance_info
+    
     def _post_process_comprehensive_wallet_data(self, wallet_data: Dict[str, Any], 
                                               include_balance: bool):
         """Comprehensive post-processing with advanced statistics"""
         
+        # Add balance information if requested
+        if include_balance:
+            self._add_balance_info(wallet_data['keys'])
+        
         # Sort data
         wallet_data['addresses'].sort(key=lambda x: x['address'])
         wallet_data['keys'].sort(key=lambda x: x.get('address_uncompressed', ''))
@@ -55,6 +55,10 @@ class opencl_interface:
                  N_value=15, openclDevice = 0):
         self.workgroupsize = 0
         self.computeunits = 0
+        # Local work size for kernel launches, None lets the OpenCL driver choose
+        self.local_worksize = None
+        # Local work size compiled into kernels as LWS (for reqd_work_group_size), None to leave it out
+        self.build_worksize = None
         self.wordSize = None
         self.N = None
         self.wordType = None
@@ -102,6 +106,17 @@ class opencl_interface:
         # os.environ['PYOPENCL_COMPILER_OUTPUT'] = str(debug)
         self.write_combined_file = write_combined_file
 
+    def local_dims(self):
+        if self.local_worksize:
+            return (self.local_worksize,)
+        return None
+
+    def launch_size(self, chunkSize):
+        # The global size must be a whole number of work groups when the local size is fixed
+        if self.local_worksize:
+            return -(-chunkSize // self.local_worksize) * self.local_worksize
+        return chunkSize
+
     def compile(self, bufferStructsObj, library_file, footer_file=None, N=15, invMemoryDensity=2):
         assert type(N) == int
         assert N < 20, "N >= 20 won't fit in a single buffer, so is unsupported. " + \
@@ -151,8 +166,13 @@ class opencl_interface:
             defines = "#define N {}\n#define invMemoryDensity {}\n".format(N, invMemoryDensity)
             src = defines + src
 
+        # Let the compiler specialise for a fixed local work size
+        options = []
+        if self.build_worksize:
+            options.append("-DLWS={}".format(self.build_worksize))
+
         # Kernel function instantiation. Build returns self.
-        prg = cl.Program(self.ctx, src).build()
+        prg = cl.Program(self.ctx, src).build(options=options)
         return prg
 
     # Forms the input buffer of derived keys
@@ -234,10 +254,14 @@ class opencl_interface:
                 break
             # print("Chunksize = {}".format(chunkSize))
 
+            # Pad out to the launch size with empty passwords, their results are discarded
+            launchSize = self.launch_size(chunkSize)
+            pwArray.extend(b"\x00" * ((launchSize - chunkSize) * (wordSize + inBufSize_bytes)))
+
             # Convert the pwArray into a numpy array, just the once.
             # Declare the numpy array for the digest output
             pwArray = np.frombuffer(pwArray, dtype=wordType)
-            result = np.zeros(outBufferSize * chunkSize, dtype=wordType)
+            result = np.zeros(outBufferSize * launchSize, dtype=wordType)
 
             # Make the salty array, with length at the front
             saltLen = len(salt)
@@ -257,7 +281,7 @@ class opencl_interface:
             # print(" result_g.nbytes = {}".format(result.nbytes))
 
             # Call Kernel. Automatically takes care of block/grid distribution
-            pwdim = (chunkSize,)
+            pwdim = (launchSize,)
 
             # Main function callback : could adapt to pass further data
             func(self, pwdim, pass_g, salt_g, result_g)
@@ -271,7 +295,7 @@ class opencl_interface:
 
             # Yield this block of results
             yield [bytes(result[i:i + outBufSize_bytes // wordSize])
-                   for i in range(0, len(result), outBufSize_bytes // wordSize)]
+                   for i in range(0, outBufferSize * chunkSize, outBufSize_bytes // wordSize)]
 
         # No main return
         return None
@@ -328,10 +352,14 @@ class opencl_interface:
                 break
             # print("Chunksize = {}".format(chunkSize))
 
+            # Pad out to the launch size with empty salts, their results are discarded
+            launchSize = self.launch_size(chunkSize)
+            saltArray.extend(b"\x00" * ((launchSize - chunkSize) * (self.wordSize + inBufSize_bytes)))
+
             # Convert the pwArray into a numpy array, just the once.
             # Declare the numpy array for the digest output
             saltArray = np.frombuffer(saltArray, dtype=self.wordType)
-            result = np.zeros(bufStructs.outBufferSize * chunkSize, dtype=self.wordType)
+            result = np.zeros(bufStructs.outBufferSize * launchSize, dtype=self.wordType)
 
             # Make the salty array, with length at the front
             pwLen = len(password)
@@ -353,7 +381,7 @@ class opencl_interface:
             # print(" result_g.nbytes = {}".format(result.nbytes))
 
             # Call Kernel. Automatically takes care of block/grid distribution
-            pwdim = (chunkSize,)
+            pwdim = (launchSize,)
 
             # Main function callback : could adapt to pass further data
             func(self, pwdim, pass_g, salt_g, result_g)
@@ -371,7 +399,7 @@ class opencl_interface:
             #    hexRes = hexvalue[i:i + outBufSize_hs].decode()
             #    results.append(hexRes)
 
-            for i in range(0, len(result), outBufSize_bytes // bufStructs.wordSize):
+            for i in range(0, outBufferSize * chunkSize, outBufSize_bytes // bufStructs.wordSize):
                 v = bytes(result[i:i + outBufSize_bytes // bufStructs.wordSize])
                 results.append(v)
 
@@ -610,7 +638,7 @@ class opencl_algos:
         bufStructs = ctx[1]
 
         def func(s, pwdim, pass_g, salt_g, result_g):
-            prg.hash_main(s.queue, pwdim, None, pass_g, result_g)
+            prg.hash_main(s.queue, pwdim, s.local_dims(), pass_g, result_g)
 
         return concat(self.opencl_ctx.run(bufStructs, func, iter(passwordlist), b"", mdpad_128_func))
 
@@ -627,7 +655,7 @@ class opencl_algos:
         bufStructs = ctx[1]
 
         def func(s, pwdim, pass_g, salt_g, result_g):
-            prg.hash_main(s.queue, pwdim, None, pass_g, result_g)
+            prg.hash_main(s.queue, pwdim, s.local_dims(), pass_g, result_g)
 
         return concat(self.opencl_ctx.run(bufStructs, func, iter(passwordlist), b"", mdpad_64_func))
 
@@ -644,7 +672,7 @@ class opencl_algos:
         bufStructs = ctx[1]
 
         def func(s, pwdim, pass_g, salt_g, result_g):
-            prg.hash_main(s.queue, pwdim, None, pass_g, result_g)
+            prg.hash_main(s.queue, pwdim, s.local_dims(), pass_g, result_g)
 
         return concat(self.opencl_ctx.run(bufStructs, func, iter(passwordlist), b"", mdpad_64_func))
 
@@ -661,7 +689,7 @@ class opencl_algos:
         bufStructs = ctx[1]
 
         def func(s, pwdim, pass_g, salt_g, result_g):
-            prg.hash_main(s.queue, pwdim, None, pass_g, result_g)
+            prg.hash_main(s.queue, pwdim, s.local_dims(), pass_g, result_g)
 
         return concat(self.opencl_ctx.run(bufStructs, func, iter(passwordlist), b"", mdpad_64_func))
 
@@ -672,7 +700,7 @@ class opencl_algos:
         bufStructs = ctx[1]
 
         def func(s, pwdim, pass_g, salt_g, result_g):
-            prg.hmac_main(s.queue, pwdim, None, pass_g, salt_g, result_g)
+            prg.hmac_main(s.queue, pwdim, s.local_dims(), pass_g, salt_g, result_g)
 
         return concat(self.opencl_ctx.run(bufStructs, func, iter(passwordlist), salt))
 
@@ -699,7 +727,7 @@ class opencl_algos:
         bufStructs = ctx[1]
 
         def func(s, pwdim, pass_g, salt_g, result_g):
-            prg.pbkdf2(s.queue, pwdim, None, pass_g, salt_g, result_g,
+            prg.pbkdf2(s.queue, pwdim, s.local_dims(), pass_g, salt_g, result_g,
                        iters.to_bytes(4, 'little'), dklen.to_bytes(4, 'little'))  # ! iters, dklen are always ints
 
         result = concat(self.opencl_ctx.run(bufStructs, func, iter(passwordlist), salt))
@@ -743,7 +771,7 @@ class opencl_algos:
         prg = ctx[0]
         bufStructs = ctx[1]
         def func(s, pwdim, pass_g, salt_g, result_g):
-            prg.pbkdf2_saltlist(s.queue, pwdim, None, pass_g, salt_g, result_g,
+            prg.pbkdf2_saltlist(s.queue, pwdim, s.local_dims(), pass_g, salt_g, result_g,
                        (iters).to_bytes(4, 'little'), (dklen).to_bytes(4, 'little'))    # ! iters, dklen are always ints
 
         result = concat(self.opencl_ctx.run_saltlist(bufStructs, func, iter(saltlist), password))
@@ -778,7 +806,7 @@ class opencl_algos:
         prg = ctx[0]
         bufStructs = ctx[1]
         def func(s, pwdim, pass_g, salt_g, result_g):
-            prg.hash_iterations(s.queue, pwdim, None, pass_g, result_g, iters.to_bytes(4, 'little'), hash_size.to_bytes(4, 'little'))    # ! iters are always ints
+            prg.hash_iterations(s.queue, pwdim, s.local_dims(), pass_g, result_g, iters.to_bytes(4, 'little'), hash_size.to_bytes(4, 'little'))    # ! iters are always ints
 
         return concat(self.opencl_ctx.run(bufStructs, func, iter(passwordlist), b"", mdpad_64_func))
 
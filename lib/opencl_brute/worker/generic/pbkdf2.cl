@@ -151,7 +151,11 @@ static void F(__global word *pwd, const word pwdLen_bytes,
     }
 }
 
-__kernel void pbkdf2(__global inbuf *inbuffer, __global const saltbuf *saltbuffer, __global outbuf *outbuffer,
+__kernel
+#ifdef LWS
+__attribute__((reqd_work_group_size(LWS, 1, 1)))
+#endif
+void pbkdf2(__global inbuf *inbuffer, __global const saltbuf *saltbuffer, __global outbuf *outbuffer,
     __private unsigned int iters, __private unsigned int dkLen_bytes)
 {
 
@@ -565,7 +565,11 @@ static void F(__global const unsigned int *pass, const unsigned int pass_len, un
 }
 
 
-__kernel void pbkdf2(__global inbuf *inbuffer, __global const saltbuf *saltbuffer, __global outbuf *outbuffer,
+__kernel
+#ifdef LWS
+__attribute__((reqd_work_group_size(LWS, 1, 1)))
+#endif
+void pbkdf2(__global inbuf *inbuffer, __global const saltbuf *saltbuffer, __global outbuf *outbuffer,
     __private unsigned int iters, __private unsigned int dkLen_bytes)
 {
 
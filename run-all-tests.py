@@ -55,7 +55,7 @@ except ImportError:
 if __name__ == "__main__":
     import argparse, sys, atexit, time, timeit, os, multiprocessing
 
-    from btcrecover.test import test_passwords
+    from btcrecover.test import test_passwords, test_pywallet, test_bitcoin2john
 
     is_coincurve_loadable = test_passwords.can_load_coincurve()
     if is_coincurve_loadable:
@@ -115,6 +115,14 @@ if __name__ == "__main__":
     else:
         print("\nwarning: skipping seed recovery tests (can't find prerequisite coincurve)")
 
+    print("\n** Testing pywallet dumps **")
+    results = main(test_pywallet, exit=False, buffer= not args.no_buffer).result
+    accumulate_results(results)
+
+    print("\n** Testing bitcoin2john **")
+    results = main(test_bitcoin2john, exit=False, buffer= not args.no_buffer).result
+    accumulate_results(results)
+
     print("\n\n*** Full Results ***")
     if has_green:
         # Print the results in color using green